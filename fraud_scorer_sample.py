@@ -10,45 +10,290 @@ Usage:
     python fraud_scorer_sample.py input_leads.csv
 
 Requirements:
-    pip install pandas openpyxl phonenumbers fuzzywuzzy python-Levenshtein
+    pip install pandas numpy openpyxl phonenumbers fuzzywuzzy python-Levenshtein
+    pip install numba  # optional, JIT-compiles the per-lead scoring kernel
+    pip install xlsxwriter  # optional, faster Excel output
+    pip install joblib  # optional, scores very large batches across CPU cores
+    pip install pyarrow  # optional, faster CSV loading and Arrow-backed strings
 """
 
 import pandas as pd
+import numpy as np
 import json
 import re
-import hashlib
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter
 import sys
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional - without it the scoring kernel runs as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+try:
+    import xlsxwriter  # noqa: F401
+    EXCEL_ENGINE = 'xlsxwriter'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    pa_csv = None
+    STRING_DTYPE = 'string'
+
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    # joblib is optional - without it batches are scored in a single process
+    Parallel = None
+
 # If you have API keys, uncomment and use:
 # from twilio.rest import Client
 # import zerobounce
 # import requests
 
+_DIGITS_RE = re.compile(r'\D')
+_EMAIL_LOCAL_RE = re.compile(r'[a-zA-Z0-9._%+-]+')
+_EMAIL_DOMAIN_RE = re.compile(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_EMAIL_RE = re.compile(f'^{_EMAIL_LOCAL_RE.pattern}@{_EMAIL_DOMAIN_RE.pattern}$')
+
+DISPOSABLE_DOMAINS = frozenset({
+    'guerrillamail.com', 'temp-mail.org', '10minutemail.com',
+    'mailinator.com', 'throwaway.email', 'tempmail.com',
+    'getnada.com', 'maildrop.cc', 'yopmail.com', 'fakeinbox.com',
+    'emailondeck.com', 'throwawaymail.com', 'trashmail.com',
+    'sharklasers.com', 'spam4.me', 'tempr.email'
+})
+
+GIBBERISH_PATTERNS = frozenset({
+    'asdfgh', 'qwerty', 'zxcvbn', 'test test', 'test',
+    'fake', 'xxx', 'aaa', 'zzz', 'nnn', '111', '123', 'abc'
+})
+
+# Fraud flags in reason order, with the points and category (0 = contact,
+# 1 = duplicate, 2 = quality) each one contributes
+FLAG_REASONS = (
+    'Missing phone number',
+    'Invalid phone format',
+    'Missing email address',
+    'Invalid email format',
+    'Disposable email domain',
+    'Phone number repeated 3+ times',
+    'Email repeated 3+ times',
+    'Exact duplicate detected',
+    'Invalid or gibberish name',
+    'Missing critical fields'
+)
+FLAG_POINTS = np.array([10, 10, 10, 10, 10, 10, 10, 15, 10, 10], dtype=np.int16)
+FLAG_CATEGORIES = np.array([0, 0, 0, 0, 0, 0, 0, 1, 2, 2], dtype=np.int8)
+CATEGORY_CAPS = np.array([40, 25, 10], dtype=np.int16)
+CLASSIFICATIONS = ('VALID', 'SUSPICIOUS', 'FRAUDULENT')
+
+# Lead columns read as strings: skips type inference on large files and keeps
+# leading zeros in phone numbers and ZIP codes. With pyarrow the strings are
+# stored as contiguous UTF-8 and the .str checks in scoring run as Arrow kernels
+LEAD_DTYPES = {'name': STRING_DTYPE, 'email': STRING_DTYPE, 'phone': STRING_DTYPE, 'zip': STRING_DTYPE}
+
+# Above this many leads the per-lead sheet is written as CSV instead of Excel
+LARGE_BATCH_ROWS = 50_000
+
+# Batches of at least PARALLEL_MIN_ROWS leads are scored in chunks of
+# PARALLEL_CHUNK_ROWS across worker processes (needs joblib)
+PARALLEL_MIN_ROWS = 200_000
+PARALLEL_CHUNK_ROWS = 50_000
+
+
+@njit(cache=True)
+def _score_kernel(flags):
+    """
+    Turn an int8 flag vector (ordered like FLAG_REASONS) into scores.
+
+    Returns:
+        int16 array of [fraud_score, class_id, contact, duplicate, quality],
+        where class_id indexes CLASSIFICATIONS
+    """
+    out = np.zeros(5, dtype=np.int16)
+
+    for i in range(flags.shape[0]):
+        if flags[i]:
+            out[0] += FLAG_POINTS[i]
+            out[2 + FLAG_CATEGORIES[i]] += FLAG_POINTS[i]
+
+    # Cap each category score (the total score is not capped)
+    for c in range(3):
+        out[2 + c] = min(out[2 + c], CATEGORY_CAPS[c])
+
+    if out[0] >= 50:
+        out[1] = 2
+    elif out[0] >= 25:
+        out[1] = 1
+
+    return out
+
+
+def _text_value(value):
+    """Return a single lead field as a string, with missing values as ''."""
+    if pd.isna(value):
+        return ''
+    return str(value)
+
+
+def _text_column(leads_df, column):
+    """Return a lead column as strings, with missing values as ''."""
+    if column not in leads_df:
+        return pd.Series('', index=leads_df.index, dtype=STRING_DTYPE)
+    return leads_df[column].astype(STRING_DTYPE).fillna('')
+
+
+def _phone_key(value):
+    """Phone as compared across leads: digits only."""
+    return _DIGITS_RE.sub('', _text_value(value))
+
+
+def _email_key(value):
+    """Email as compared across leads: trimmed and lower-cased."""
+    return _text_value(value).strip().lower()
+
+
+def _score_leads(leads, disposable_domains, gibberish_patterns):
+    """
+    Score leads whose cross-lead checks are already done.
+
+    leads holds name/email/phone/phone_digits as strings plus the boolean
+    repeated_phone, repeated_email and is_duplicate columns from
+    SimpleFraudScorer.score_batch.
+    Every row is scored on its own, so any slice of a batch can be scored
+    separately (and in another process).
+
+    Returns:
+        DataFrame (same index as leads) with fraud_score, classification,
+        is_fraudulent, fraud_reasons and breakdown_* columns
+    """
+    phone, email, name = leads['phone'], leads['email'], leads['name']
+    repeated_phone = leads['repeated_phone'].to_numpy(dtype=bool)
+    repeated_email = leads['repeated_email'].to_numpy(dtype=bool)
+    is_duplicate = leads['is_duplicate'].to_numpy(dtype=bool)
+
+    # CONTACT VALIDATION
+
+    missing_phone = (phone == '').to_numpy(dtype=bool)
+    # Format check is a digit count over the whole column (10 US, 11 with
+    # country code); no per-lead phonenumbers.parse - carrier/region checks
+    # belong to the Twilio lookup in production
+    phone_digits = leads['phone_digits']
+    valid_phone = phone_digits.str.len().isin([10, 11]).to_numpy(dtype=bool)
+    invalid_phone = ~missing_phone & ~valid_phone
+
+    # Split each address once and reuse the parts for every email check
+    parts = email.str.extract(r'(?s)^([^@]*)(@?)(.*)$')
+    local, has_at, domain = parts[0], parts[1] == '@', parts[2]
+    missing_email = (email == '').to_numpy(dtype=bool)
+    valid_email = (
+        has_at
+        & local.str.fullmatch(_EMAIL_LOCAL_RE.pattern)
+        & domain.str.fullmatch(_EMAIL_DOMAIN_RE.pattern)
+    ).to_numpy(dtype=bool)
+    invalid_email = ~missing_email & ~valid_email
+    disposable = valid_email & domain.str.lower().isin(disposable_domains).to_numpy(dtype=bool)
+
+    # DATA QUALITY
+
+    missing_name = (name == '').to_numpy(dtype=bool)
+    name_clean = name.str.lower().str.strip()
+    bad_name = (
+        missing_name
+        | name_clean.isin(gibberish_patterns).to_numpy(dtype=bool)
+        | name_clean.str.len().le(1).to_numpy(dtype=bool)
+        | name_clean.str.contains(r'\d', regex=True).to_numpy(dtype=bool)
+    )
+    # "Missing critical fields" only applies when no other Missing reason fired
+    missing_critical = missing_name & ~missing_phone & ~missing_email
+
+    # CLASSIFY LEADS
+
+    # One row per lead, flag columns in FLAG_REASONS order
+    flags = np.column_stack([
+        missing_phone, invalid_phone, missing_email, invalid_email,
+        disposable, repeated_phone, repeated_email, is_duplicate,
+        bad_name, missing_critical
+    ])
+
+    # Points each flag adds to each category; one matrix product scores every lead
+    category_points = FLAG_POINTS[:, None] * (FLAG_CATEGORIES[:, None] == np.arange(3))
+    category_scores = flags.astype(np.int16) @ category_points
+    score = category_scores.sum(axis=1, dtype=np.int16)
+    breakdown = np.minimum(category_scores, CATEGORY_CAPS).astype(np.int8)
+
+    is_fraudulent = score >= 50
+    classification = np.select(
+        [is_fraudulent, score >= 25], ['FRAUDULENT', 'SUSPICIOUS'], default='VALID'
+    )
+
+    # Pack each lead's flags into a bitmask and build the reason string once
+    # per distinct combination (a handful per batch) instead of once per lead;
+    # leads with no flags map to ''
+    codes = flags.astype(np.int16) @ (1 << np.arange(len(FLAG_REASONS), dtype=np.int16))
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    labels = np.array([
+        ', '.join(label for bit, label in enumerate(FLAG_REASONS) if code >> bit & 1)
+        for code in unique_codes
+    ], dtype=object)
+    reasons = labels[inverse]
+
+    return pd.DataFrame({
+        'fraud_score': score,
+        'classification': classification,
+        'is_fraudulent': is_fraudulent,
+        'fraud_reasons': reasons,
+        'breakdown_contact': breakdown[:, 0],
+        'breakdown_duplicate': breakdown[:, 1],
+        'breakdown_quality': breakdown[:, 2]
+    }, index=leads.index)
+
+
+def read_leads_csv(input_file):
+    """
+    Load a leads CSV with the LEAD_DTYPES columns read as strings.
+
+    Uses pyarrow's multi-threaded CSV reader when pyarrow is installed (falling
+    back to pandas if it cannot parse the file) and pandas' C parser otherwise.
+    The lead columns are typed up front in both readers, so phone numbers and
+    ZIP codes keep their leading zeros.
+    """
+    if pa_csv is not None:
+        try:
+            convert_options = pa_csv.ConvertOptions(
+                column_types={column: pa.string() for column in LEAD_DTYPES},
+                strings_can_be_null=True
+            )
+            leads_df = pa_csv.read_csv(input_file, convert_options=convert_options).to_pandas()
+            return leads_df.astype({c: dtype for c, dtype in LEAD_DTYPES.items() if c in leads_df})
+        except pa.ArrowInvalid:
+            pass
+
+    return pd.read_csv(input_file, dtype=LEAD_DTYPES, engine='c')
+
+
 class SimpleFraudScorer:
     """
     Simplified fraud scorer that works without API keys.
     For production, integrate Twilio, ZeroBounce, and IPQualityScore APIs.
     """
 
-    def __init__(self):
-        self.disposable_domains = {
-            'guerrillamail.com', 'temp-mail.org', '10minutemail.com',
-            'mailinator.com', 'throwaway.email', 'tempmail.com',
-            'getnada.com', 'maildrop.cc', 'yopmail.com', 'fakeinbox.com',
-            'emailondeck.com', 'throwawaymail.com', 'trashmail.com',
-            'sharklasers.com', 'spam4.me', 'tempr.email'
-        }
-
-        self.gibberish_patterns = {
-            'asdfgh', 'qwerty', 'zxcvbn', 'test test', 'test',
-            'fake', 'xxx', 'aaa', 'zzz', 'nnn', '111', '123', 'abc'
-        }
+    disposable_domains = DISPOSABLE_DOMAINS
+    gibberish_patterns = GIBBERISH_PATTERNS
 
-        self.seen_phones = defaultdict(int)
-        self.seen_emails = defaultdict(int)
-        self.seen_hashes = set()
+    def __init__(self):
+        # Phone-digit/normalized-email occurrence counts (shared by score_lead and score_batch)
+        self.seen_phones = Counter()
+        self.seen_emails = Counter()
+        # name|email|phone-digits keys already scored (shared by score_lead and score_batch)
+        self.seen_keys = set()
 
     def validate_phone_format(self, phone):
         """Basic phone format validation."""
@@ -56,7 +301,7 @@ class SimpleFraudScorer:
             return False
 
         # Remove all non-digits
-        digits = re.sub(r'\D', '', str(phone))
+        digits = _DIGITS_RE.sub('', str(phone))
 
         # Should be 10 digits (US) or 11 with country code
         if len(digits) == 10 or len(digits) == 11:
@@ -69,9 +314,9 @@ class SimpleFraudScorer:
         if not email:
             return False
 
-        # Simple regex for email validation
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, str(email)))
+        # Simple regex for email validation; fullmatch, like score_batch, so a
+        # trailing newline is not accepted by the "$" anchor
+        return bool(_EMAIL_RE.fullmatch(str(email)))
 
     def is_disposable_email(self, email):
         """Check if email domain is disposable."""
@@ -103,136 +348,148 @@ class SimpleFraudScorer:
         return False
 
     def find_exact_duplicate(self, lead):
-        """Check for exact duplicates using hash."""
-        hash_string = f"{lead.get('name', '')}|{lead.get('email', '')}|{lead.get('phone', '')}"
-        lead_hash = hashlib.md5(hash_string.encode()).hexdigest()
+        """Check for exact duplicates on name + normalized email + phone digits."""
+        key = '|'.join((
+            _text_value(lead.get('name')), _email_key(lead.get('email')), _phone_key(lead.get('phone'))
+        ))
 
-        if lead_hash in self.seen_hashes:
+        if key in self.seen_keys:
             return True
 
-        self.seen_hashes.add(lead_hash)
+        self.seen_keys.add(key)
         return False
 
     def check_repeated_contact(self, lead):
-        """Check if phone/email appears multiple times."""
-        phone = str(lead.get('phone', ''))
-        email = str(lead.get('email', ''))
+        """Check if phone (digits only) / email (any case) appears multiple times."""
+        phone = _phone_key(lead.get('phone'))
+        email = _email_key(lead.get('email'))
 
         self.seen_phones[phone] += 1
         self.seen_emails[email] += 1
 
-        repeated_phone = self.seen_phones[phone] >= 3
-        repeated_email = self.seen_emails[email] >= 3
+        repeated_phone = bool(phone) and self.seen_phones[phone] >= 3
+        repeated_email = bool(email) and self.seen_emails[email] >= 3
 
         return repeated_phone, repeated_email
 
+    def update_batch(self, phones, emails):
+        """Add a whole batch of phones/emails to the repeated-contact counts."""
+        self.seen_phones.update(phones)
+        self.seen_emails.update(emails)
+
     def score_lead(self, lead, batch_data=None):
         """
         Calculate fraud score for a single lead.
 
+        Args:
+            lead: Lead dict
+            batch_data: Unused, kept for backwards compatibility
+
         Returns:
             dict with fraud_score (0-100), classification, reasons, and breakdown
         """
-        score = 0
-        reasons = []
-        breakdown = {
-            'contact': 0,
-            'duplicate': 0,
-            'geographic': 0,
-            'timing': 0,
-            'quality': 0
-        }
-
-        # CONTACT VALIDATION (40 points max)
-
-        # Phone validation
-        phone = lead.get('phone', '')
-        if not phone:
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Missing phone number')
-        elif not self.validate_phone_format(phone):
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Invalid phone format')
-
-        # Email validation
-        email = lead.get('email', '')
-        if not email:
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Missing email address')
-        elif not self.validate_email_format(email):
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Invalid email format')
-        elif self.is_disposable_email(email):
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Disposable email domain')
-
-        # Check for repeated contacts
+        phone = _text_value(lead.get('phone'))
+        email = _text_value(lead.get('email'))
+        name = _text_value(lead.get('name'))
+
+        # CONTACT VALIDATION
+        missing_phone = not phone
+        missing_email = not email
+        valid_email = self.validate_email_format(email)
         repeated_phone, repeated_email = self.check_repeated_contact(lead)
-        if repeated_phone:
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Phone number repeated 3+ times')
-        if repeated_email:
-            score += 10
-            breakdown['contact'] += 10
-            reasons.append('Email repeated 3+ times')
-
-        # Cap contact score at 40
-        breakdown['contact'] = min(breakdown['contact'], 40)
-
-        # DUPLICATE DETECTION (25 points max)
-
-        if self.find_exact_duplicate(lead):
-            score += 15
-            breakdown['duplicate'] += 15
-            reasons.append('Exact duplicate detected')
-
-        # Cap duplicate score at 25
-        breakdown['duplicate'] = min(breakdown['duplicate'], 25)
-
-        # DATA QUALITY (10 points max)
-
-        name = lead.get('name', '')
-        if not name or self.is_gibberish_name(name):
-            score += 10
-            breakdown['quality'] += 10
-            reasons.append('Invalid or gibberish name')
-
-        # Check for missing critical fields
-        if not name or not email or not phone:
-            if 'Missing' not in ' '.join(reasons):  # Avoid duplicate reason
-                score += 10
-                breakdown['quality'] += 10
-                reasons.append('Missing critical fields')
-
-        # Cap quality score at 10
-        breakdown['quality'] = min(breakdown['quality'], 10)
-
-        # CLASSIFY LEAD
-
-        if score >= 50:
-            classification = 'FRAUDULENT'
-            is_fraudulent = True
-        elif score >= 25:
-            classification = 'SUSPICIOUS'
-            is_fraudulent = False
-        else:
-            classification = 'VALID'
-            is_fraudulent = False
+
+        # "Missing critical fields" only applies when no other Missing reason fired
+        flags = np.array([
+            missing_phone,
+            not missing_phone and not self.validate_phone_format(phone),
+            missing_email,
+            not missing_email and not valid_email,
+            valid_email and self.is_disposable_email(email),
+            repeated_phone,
+            repeated_email,
+            # DUPLICATE DETECTION
+            self.find_exact_duplicate(lead),
+            # DATA QUALITY
+            self.is_gibberish_name(name),
+            not name and not missing_phone and not missing_email
+        ], dtype=np.int8)
+
+        score, class_id, contact, duplicate, quality = _score_kernel(flags)
 
         return {
-            'fraud_score': score,
-            'classification': classification,
-            'is_fraudulent': is_fraudulent,
-            'reasons': reasons,
-            'breakdown': breakdown
+            'fraud_score': int(score),
+            'classification': CLASSIFICATIONS[class_id],
+            'is_fraudulent': bool(class_id == 2),
+            'reasons': [FLAG_REASONS[i] for i in np.flatnonzero(flags)],
+            'breakdown': {
+                'contact': int(contact),
+                'duplicate': int(duplicate),
+                'geographic': 0,
+                'timing': 0,
+                'quality': int(quality)
+            }
         }
 
+    def score_batch(self, leads_df, n_jobs=1):
+        """
+        Calculate fraud scores for an entire batch of leads at once.
+
+        Applies the same rules as score_lead, but each check runs once over
+        the whole column instead of once per lead. Repeat and duplicate
+        checks always see the whole batch; with joblib installed, batches of
+        PARALLEL_MIN_ROWS+ leads are then scored in chunks across n_jobs
+        processes (-1 = all CPU cores).
+
+        Returns:
+            DataFrame (same index as leads_df) with fraud_score, classification,
+            is_fraudulent, fraud_reasons and breakdown_* columns
+        """
+        phone = _text_column(leads_df, 'phone')
+        email = _text_column(leads_df, 'email')
+        name = _text_column(leads_df, 'name')
+
+        # CROSS-LEAD CHECKS (need the whole batch, so they run before chunking)
+
+        # Contacts are compared normalized: phone digits, trimmed lower-case email
+        phone_digits = phone.str.replace(_DIGITS_RE.pattern, '', regex=True)
+        email_key = email.str.strip().str.lower()
+        has_phone = phone_digits != ''
+        has_email = email_key != ''
+
+        # Counted over the whole batch plus earlier leads, so every occurrence
+        # of a contact seen 3+ times is flagged (not just the third onwards).
+        # Taken as int arrays: mapping an empty string column keeps its string dtype
+        phone_counts = (phone_digits.map(phone_digits.value_counts()).to_numpy(dtype=np.int64)
+                        + phone_digits.map(self.seen_phones).to_numpy(dtype=np.int64))
+        email_counts = (email_key.map(email_key.value_counts()).to_numpy(dtype=np.int64)
+                        + email_key.map(self.seen_emails).to_numpy(dtype=np.int64))
+        repeated_phone = (phone_counts >= 3) & has_phone
+        repeated_email = (email_counts >= 3) & has_email
+        self.update_batch(phone_digits[has_phone].tolist(), email_key[has_email].tolist())
+
+        # DUPLICATE DETECTION
+        # Same lead despite phone punctuation or email case/whitespace
+        key = name.str.cat([email_key, phone_digits], sep='|', na_rep='')
+        is_duplicate = key.duplicated(keep='first') | key.isin(self.seen_keys)
+        self.seen_keys.update(key.tolist())
+
+        leads = pd.DataFrame({
+            'name': name, 'email': email, 'phone': phone, 'phone_digits': phone_digits,
+            'repeated_phone': repeated_phone, 'repeated_email': repeated_email,
+            'is_duplicate': is_duplicate
+        })
+
+        if Parallel is None or n_jobs == 1 or len(leads) < PARALLEL_MIN_ROWS:
+            return _score_leads(leads, self.disposable_domains, self.gibberish_patterns)
+
+        chunks = (leads.iloc[start:start + PARALLEL_CHUNK_ROWS]
+                  for start in range(0, len(leads), PARALLEL_CHUNK_ROWS))
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_score_leads)(chunk, self.disposable_domains, self.gibberish_patterns)
+            for chunk in chunks
+        )
+        return pd.concat(results)
+
     def calculate_batch_refund(self, leads_df):
         """Calculate refund for entire batch based on fraud percentage."""
         total_leads = len(leads_df)
@@ -259,14 +516,43 @@ class SimpleFraudScorer:
         }
 
 
-def generate_summary_report(leads_df, refund_info, batch_cost=None):
-    """Generate a text summary report."""
+def excel_writer(output_file):
+    """
+    Open an ExcelWriter for a report.
+
+    Uses xlsxwriter (write-only, much faster than openpyxl) when it is
+    installed. Its constant_memory mode is not used: pandas writes cells
+    column by column and that mode only accepts row order.
+    """
+    return pd.ExcelWriter(output_file, engine=EXCEL_ENGINE)
+
+
+def count_reasons(reasons):
+    """
+    Count leads per fraud reason from joined fraud_reasons strings.
+
+    Only the distinct reason combinations (at most a few hundred) are split,
+    not every lead's string.
+
+    Returns:
+        Series of lead counts indexed by reason, most common first
+    """
+    combos = reasons[reasons != ''].value_counts()
+    per_reason = pd.DataFrame({
+        'reason': combos.index.str.split(', '),
+        'count': combos.to_numpy()
+    }).explode('reason')
+    return per_reason.groupby('reason')['count'].sum().sort_values(ascending=False, kind='stable')
+
+
+def generate_summary_report(leads_df, refund_info, batch_cost=None, analysis_date=None):
+    """Generate a text summary report (analysis_date defaults to now)."""
 
     report = []
     report.append("=" * 70)
     report.append("ANTHONY LEAD FORENSICS - FRAUD ANALYSIS REPORT")
     report.append("=" * 70)
-    report.append(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    report.append(f"Analysis Date: {(analysis_date or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}")
     report.append("")
 
     report.append("BATCH STATISTICS:")
@@ -278,9 +564,9 @@ def generate_summary_report(leads_df, refund_info, batch_cost=None):
 
     report.append("FRAUD BREAKDOWN BY CATEGORY:")
     report.append("-" * 70)
-    avg_contact = leads_df['breakdown_contact'].mean()
-    avg_duplicate = leads_df['breakdown_duplicate'].mean()
-    avg_quality = leads_df['breakdown_quality'].mean()
+    avg_contact, avg_duplicate, avg_quality = leads_df[
+        ['breakdown_contact', 'breakdown_duplicate', 'breakdown_quality']
+    ].mean()
 
     report.append(f"Contact Validation Issues: {avg_contact:.1f} points (avg)")
     report.append(f"Duplicate Detection: {avg_duplicate:.1f} points (avg)")
@@ -290,12 +576,7 @@ def generate_summary_report(leads_df, refund_info, batch_cost=None):
     report.append("TOP FRAUD INDICATORS:")
     report.append("-" * 70)
     # Count reasons
-    all_reasons = []
-    for reasons_str in leads_df['fraud_reasons']:
-        if reasons_str:
-            all_reasons.extend(reasons_str.split(', '))
-
-    reason_counts = pd.Series(all_reasons).value_counts().head(10)
+    reason_counts = count_reasons(leads_df['fraud_reasons']).head(10)
     for idx, (reason, count) in enumerate(reason_counts.items(), 1):
         percentage = (count / len(leads_df)) * 100
         report.append(f"{idx}. {reason}: {count} leads ({percentage:.1f}%)")
@@ -373,7 +654,7 @@ def main():
 
     # Load lead file
     try:
-        leads_df = pd.read_csv(input_file)
+        leads_df = read_leads_csv(input_file)
     except Exception as e:
         print(f"ERROR: Could not load file: {e}")
         sys.exit(1)
@@ -385,25 +666,13 @@ def main():
     # Initialize scorer
     scorer = SimpleFraudScorer()
 
-    # Score each lead
-    results = []
-    for idx, lead in leads_df.iterrows():
-        progress = ((idx + 1) / len(leads_df)) * 100
-        print(f"Processing lead {idx + 1}/{len(leads_df)} ({progress:.1f}%)...", end='\r')
+    # Score all leads in one vectorized pass
+    results = scorer.score_batch(leads_df, n_jobs=-1)
 
-        result = scorer.score_lead(lead.to_dict(), leads_df)
-        results.append(result)
+    print("Scoring complete!")
 
-    print("\nScoring complete!                                                      ")
-
-    # Add results to dataframe
-    leads_df['fraud_score'] = [r['fraud_score'] for r in results]
-    leads_df['classification'] = [r['classification'] for r in results]
-    leads_df['is_fraudulent'] = [r['is_fraudulent'] for r in results]
-    leads_df['fraud_reasons'] = [', '.join(r['reasons']) if r['reasons'] else '' for r in results]
-    leads_df['breakdown_contact'] = [r['breakdown']['contact'] for r in results]
-    leads_df['breakdown_duplicate'] = [r['breakdown']['duplicate'] for r in results]
-    leads_df['breakdown_quality'] = [r['breakdown']['quality'] for r in results]
+    # Add results to dataframe (one concat; re-scored files replace old columns)
+    leads_df = pd.concat([leads_df.drop(columns=results.columns, errors='ignore'), results], axis=1)
 
     # Calculate refund
     batch_cost = len(leads_df) * cost_per_lead if cost_per_lead else None
@@ -417,12 +686,22 @@ def main():
     output_file = input_file.replace('.csv', '_fraud_analysis.xlsx')
     print(f"\nSaving detailed results to: {output_file}")
 
+    csv_output = input_file.replace('.csv', '_fraud_analysis.csv')
+    large_batch = len(leads_df) > LARGE_BATCH_ROWS
+
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        if large_batch:
+            # Excel is too slow for this many rows; keep only the summary in the workbook
+            leads_df.to_csv(csv_output, index=False)
+            print(f"✓ Lead analysis saved to CSV: {csv_output}")
+
+        with excel_writer(output_file) as writer:
             # Main analysis sheet
-            leads_df.to_excel(writer, sheet_name='Lead Analysis', index=False)
+            if not large_batch:
+                leads_df.to_excel(writer, sheet_name='Lead Analysis', index=False)
 
             # Summary sheet
+            score_mean, score_median = leads_df['fraud_score'].agg(['mean', 'median'])
             summary_data = {
                 'Metric': [
                     'Total Leads',
@@ -441,8 +720,8 @@ def main():
                     f"{refund_info['fraud_percentage']:.1f}%",
                     refund_info['refund_type'],
                     f"{refund_info['refund_percentage']:.1f}%",
-                    f"{leads_df['fraud_score'].mean():.1f}",
-                    f"{leads_df['fraud_score'].median():.1f}"
+                    f"{score_mean:.1f}",
+                    f"{score_median:.1f}"
                 ]
             }
             pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
@@ -452,7 +731,6 @@ def main():
     except Exception as e:
         print(f"WARNING: Could not save Excel file: {e}")
         # Fall back to CSV
-        csv_output = input_file.replace('.csv', '_fraud_analysis.csv')
         leads_df.to_csv(csv_output, index=False)
         print(f"✓ Results saved to CSV: {csv_output}")
 
@@ -466,13 +744,9 @@ def main():
     print("ANALYSIS COMPLETE!")
     print("=" * 70)
 
-    # Return exit code based on refund status
-    if refund_info['fraud_percentage'] >= 25:
-        sys.exit(2)  # Full refund scenario
-    elif refund_info['fraud_percentage'] >= 15:
-        sys.exit(1)  # Partial refund scenario
-    else:
-        sys.exit(0)  # No refund scenario
+    # Return exit code based on refund status: 2 = full, 1 = partial, 0 = no refund
+    fraud_percentage = refund_info['fraud_percentage']
+    sys.exit(2 if fraud_percentage >= 25 else 1 if fraud_percentage >= 15 else 0)
 
 
 if __name__ == '__main__':
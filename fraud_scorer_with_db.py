@@ -10,35 +10,85 @@ Usage:
 
 Requirements:
     pip install pandas openpyxl phonenumbers fuzzywuzzy python-Levenshtin supabase python-dotenv
+    pip install "psycopg[binary]"  # optional, COPY-based lead insert for large batches
+    pip install tqdm  # optional, progress bars while saving leads
 """
 
 import pandas as pd
 import sys
 import argparse
+import asyncio
 from datetime import datetime
-from collections import defaultdict
-import hashlib
 
 # Import the simple fraud scorer
-from fraud_scorer_sample import SimpleFraudScorer, generate_summary_report
+from fraud_scorer_sample import (
+    SimpleFraudScorer, generate_summary_report, count_reasons, excel_writer, read_leads_csv,
+    LARGE_BATCH_ROWS, FLAG_REASONS, FLAG_POINTS, FLAG_CATEGORIES
+)
 
 # Import Supabase client
 try:
-    from supabase_client import AnthonyLeadForensicsDB
+    from supabase_client import (
+        AnthonyLeadForensicsDB, AsyncAnthonyLeadForensicsDB, COPY_MIN_ROWS, MISSING_FUNCTION_CODES
+    )
+    from supabase import PostgrestAPIError
 except ImportError:
     print("ERROR: supabase_client.py not found or supabase not installed")
     print("Run: pip install supabase python-dotenv")
     sys.exit(1)
 
+try:
+    from supabase import acreate_client
+except ImportError:
+    # Older supabase releases have no async client - leads are inserted sequentially
+    acreate_client = None
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    # tqdm is optional - without it leads are saved without a progress bar
+    def tqdm(iterable, **kwargs):
+        return iterable
+
+# Lead DataFrame columns saved to the leads table, mapped to their table columns
+LEAD_RECORD_COLUMNS = {
+    'name': 'lead_name',
+    'email': 'lead_email',
+    'phone': 'lead_phone',
+    'address': 'lead_address',
+    'city': 'lead_city',
+    'state': 'lead_state',
+    'zip': 'lead_zip',
+    'fraud_score': 'fraud_score',
+    'classification': 'classification',
+    'is_fraudulent': 'is_fraudulent',
+    'breakdown_contact': 'contact_score',
+    'breakdown_duplicate': 'duplicate_score',
+    'breakdown_quality': 'quality_score',
+    'fraud_reasons': 'fraud_reasons'
+}
+SCORE_RECORD_COLUMNS = ['fraud_score', 'contact_score', 'duplicate_score', 'quality_score']
+
+# Indicator category and points for each fraud reason, built once from the
+# scorer's own flag tables so they cannot drift from the scoring rules
+INDICATOR_CATEGORIES = {
+    reason: ('contact', 'duplicate', 'quality')[category]
+    for reason, category in zip(FLAG_REASONS, FLAG_CATEGORIES)
+}
+INDICATOR_POINTS = dict(zip(FLAG_REASONS, FLAG_POINTS.tolist()))
+
 
 class FraudScorerWithDB(SimpleFraudScorer):
     """
     Enhanced fraud scorer that saves results to Supabase.
     """
 
-    def __init__(self, save_to_db=True):
+    def __init__(self, save_to_db=True, insert_batch_size=1000, insert_concurrency=8, n_jobs=-1):
         super().__init__()
         self.save_to_db = save_to_db
+        self.n_jobs = n_jobs
+        self.insert_batch_size = insert_batch_size
+        self.insert_concurrency = insert_concurrency
         self.db = None
 
         if save_to_db:
@@ -70,35 +120,25 @@ class FraudScorerWithDB(SimpleFraudScorer):
         print(f"\nProcessing batch for vendor: {vendor_name}")
         print(f"Total leads: {len(leads_df)}")
 
-        # Score each lead
+        # Score the whole batch at once (vectorized, and split across n_jobs
+        # processes for very large batches - see SimpleFraudScorer.score_batch)
         print("\nScoring leads...")
-        results = []
-        for idx, lead in leads_df.iterrows():
-            progress = ((idx + 1) / len(leads_df)) * 100
-            print(f"  Processing lead {idx + 1}/{len(leads_df)} ({progress:.1f}%)...", end='\r')
-
-            result = self.score_lead(lead.to_dict(), leads_df)
-            results.append(result)
-
-        print("\n✓ Scoring complete!")
+        results = self.score_batch(leads_df, n_jobs=self.n_jobs)
+        print("✓ Scoring complete!")
 
-        # Add results to dataframe
-        leads_df['fraud_score'] = [r['fraud_score'] for r in results]
-        leads_df['classification'] = [r['classification'] for r in results]
-        leads_df['is_fraudulent'] = [r['is_fraudulent'] for r in results]
-        leads_df['fraud_reasons'] = [', '.join(r['reasons']) if r['reasons'] else '' for r in results]
-        leads_df['breakdown_contact'] = [r['breakdown']['contact'] for r in results]
-        leads_df['breakdown_duplicate'] = [r['breakdown']['duplicate'] for r in results]
-        leads_df['breakdown_quality'] = [r['breakdown']['quality'] for r in results]
+        # Add results to dataframe (one concat; re-scored files replace old columns)
+        leads_df = pd.concat([leads_df.drop(columns=results.columns, errors='ignore'), results], axis=1)
 
         # Calculate refund
         batch_cost = len(leads_df) * cost_per_lead if cost_per_lead else None
         refund_info = self.calculate_batch_refund(leads_df)
 
-        # Prepare batch data
+        # Prepare batch data (one timestamp for the batch id, DB record and report)
+        analysis_date = datetime.now()
         batch_data = {
             'vendor_name': vendor_name,
-            'batch_identifier': batch_identifier or datetime.now().strftime('%Y%m%d_%H%M%S'),
+            'batch_identifier': batch_identifier or analysis_date.strftime('%Y%m%d_%H%M%S'),
+            'analysis_date': analysis_date,
             'lead_count': len(leads_df),
             'fraudulent_count': refund_info['fraudulent_leads'],
             'valid_count': refund_info['valid_leads'],
@@ -113,11 +153,13 @@ class FraudScorerWithDB(SimpleFraudScorer):
             'results': results
         }
 
-        # Calculate averages
-        batch_data['avg_fraud_score'] = leads_df['fraud_score'].mean()
-        batch_data['avg_contact_score'] = leads_df['breakdown_contact'].mean()
-        batch_data['avg_duplicate_score'] = leads_df['breakdown_duplicate'].mean()
-        batch_data['avg_quality_score'] = leads_df['breakdown_quality'].mean()
+        # Calculate averages (one pass over the four score columns)
+        averages = leads_df[['fraud_score', 'breakdown_contact',
+                             'breakdown_duplicate', 'breakdown_quality']].mean()
+        batch_data['avg_fraud_score'] = averages['fraud_score']
+        batch_data['avg_contact_score'] = averages['breakdown_contact']
+        batch_data['avg_duplicate_score'] = averages['breakdown_duplicate']
+        batch_data['avg_quality_score'] = averages['breakdown_quality']
 
         # Save to database if enabled
         if self.db:
@@ -130,19 +172,18 @@ class FraudScorerWithDB(SimpleFraudScorer):
         return batch_data
 
     def _save_to_database(self, batch_data):
-        """Save batch results to Supabase."""
-        try:
-            # 1. Get or create vendor
-            print("  1/4 Getting/creating vendor record...")
-            vendor = self.db.get_or_create_vendor(batch_data['vendor_name'])
-            vendor_id = vendor['id']
+        """
+        Save batch results to Supabase.
 
-            # 2. Create batch record
-            print("  2/4 Creating batch record...")
+        Uses the save_fraud_batch RPC (vendor, batch, leads and indicators in
+        one transaction) for batches of up to insert_batch_size leads when the
+        function is deployed, and the step-by-step inserts otherwise - chunked
+        (concurrently with the async client) or COPY for large batches.
+        """
+        try:
             batch_record = {
-                'vendor_id': vendor_id,
                 'batch_identifier': batch_data['batch_identifier'],
-                'batch_date': datetime.now().isoformat(),
+                'batch_date': batch_data['analysis_date'].isoformat(),
                 'lead_count': batch_data['lead_count'],
                 'fraudulent_count': batch_data['fraudulent_count'],
                 'valid_count': batch_data['valid_count'],
@@ -159,41 +200,69 @@ class FraudScorerWithDB(SimpleFraudScorer):
                 'input_filename': batch_data['input_filename']
             }
 
-            batch = self.db.create_batch(batch_record)
+            leads_df = batch_data['leads_df']
+
+            # Project to the table columns (absent optional columns become NULL)
+            # and cast whole columns once, instead of building each record by hand
+            records = leads_df.reindex(columns=list(LEAD_RECORD_COLUMNS)).rename(columns=LEAD_RECORD_COLUMNS)
+            records['lead_phone'] = records['lead_phone'].astype(str).where(records['lead_phone'].notna())
+            records[SCORE_RECORD_COLUMNS] = records[SCORE_RECORD_COLUMNS].astype(int)
+            records['is_fraudulent'] = records['is_fraudulent'].astype(bool)
+            records = records.astype(object).where(records.notna(), None)
+
+            indicators = self._generate_fraud_indicators(leads_df)
+
+            use_copy = self.db.copy_enabled and len(records) > COPY_MIN_ROWS
+
+            # One request body holds every lead, so only batches that fit in a
+            # single insert chunk go through the RPC
+            if len(records) <= self.insert_batch_size:
+                try:
+                    print(f"  Saving batch and {batch_data['lead_count']} lead records in one transaction...")
+                    saved = self.db.save_fraud_batch(
+                        batch_data['vendor_name'], batch_record, records.to_dict('records'), indicators
+                    )
+                    batch_data['vendor_id'] = saved['vendor_id']
+                    batch_data['batch_id'] = saved['batch_id']
+                    return batch_data
+                except PostgrestAPIError as e:
+                    # Only a missing function is known to have written nothing;
+                    # anything else (e.g. a timeout after commit) must not be retried
+                    if e.code not in MISSING_FUNCTION_CODES:
+                        raise
+                    print("  save_fraud_batch not deployed, saving step by step...")
+
+            # 1. Get or create vendor
+            print("  1/4 Getting/creating vendor record...")
+            vendor = self.db.get_or_create_vendor(batch_data['vendor_name'])
+            vendor_id = vendor['id']
+
+            # 2. Create batch record
+            print("  2/4 Creating batch record...")
+            batch = self.db.create_batch({'vendor_id': vendor_id, **batch_record})
             batch_id = batch['id']
             batch_data['batch_id'] = batch_id
 
             # 3. Create lead records
             print(f"  3/4 Saving {batch_data['lead_count']} lead records...")
-            leads_df = batch_data['leads_df']
-            leads_to_insert = []
-
-            for idx, (_, lead) in enumerate(leads_df.iterrows()):
-                lead_record = {
-                    'batch_id': batch_id,
-                    'lead_name': lead.get('name'),
-                    'lead_email': lead.get('email'),
-                    'lead_phone': str(lead.get('phone', '')),
-                    'lead_address': lead.get('address'),
-                    'lead_city': lead.get('city'),
-                    'lead_state': lead.get('state'),
-                    'lead_zip': lead.get('zip'),
-                    'fraud_score': int(lead['fraud_score']),
-                    'classification': lead['classification'],
-                    'is_fraudulent': bool(lead['is_fraudulent']),
-                    'contact_score': int(lead['breakdown_contact']),
-                    'duplicate_score': int(lead['breakdown_duplicate']),
-                    'quality_score': int(lead['breakdown_quality']),
-                    'fraud_reasons': lead['fraud_reasons']
-                }
-                leads_to_insert.append(lead_record)
-
-            # Bulk insert leads
-            self.db.create_leads(leads_to_insert)
+            records.insert(0, 'batch_id', batch_id)
+
+            # Bulk insert leads: COPY for large batches, otherwise REST inserts
+            # with several chunks in flight when the async client is available
+            if use_copy:
+                rows = records.itertuples(index=False, name=None)
+                self.db.copy_rows('leads', list(records.columns),
+                                  tqdm(rows, total=len(records), **self._progress('lead')))
+            elif acreate_client and self.insert_concurrency > 1:
+                asyncio.run(self._save_leads_async(records.to_dict('records')))
+            else:
+                leads_to_insert = records.to_dict('records')
+                size = self.insert_batch_size
+                for i in tqdm(range(0, len(leads_to_insert), size), **self._progress('chunk')):
+                    self.db.create_leads(leads_to_insert[i:i + size], chunk_size=size, return_rows=False)
 
             # 4. Create fraud indicators
             print("  4/4 Saving fraud indicators...")
-            indicators = self._generate_fraud_indicators(leads_df)
             if indicators:
                 self.db.create_fraud_indicators(batch_id, indicators)
 
@@ -207,67 +276,46 @@ class FraudScorerWithDB(SimpleFraudScorer):
             traceback.print_exc()
             return batch_data
 
+    async def _save_leads_async(self, leads_to_insert):
+        """Insert lead chunks concurrently (up to insert_concurrency requests at once)."""
+        db = await AsyncAnthonyLeadForensicsDB.create(
+            self.db.url, self.db.key, concurrency=self.insert_concurrency
+        )
+        async with db:
+            await db.create_leads(
+                leads_to_insert, chunk_size=self.insert_batch_size,
+                progress=lambda chunks, total: tqdm(chunks, total=total, **self._progress('chunk')),
+                return_rows=False
+            )
+
+    @staticmethod
+    def _progress(unit):
+        """tqdm options for insert progress: redraw at most twice a second."""
+        return {'desc': '      Saving leads', 'unit': unit, 'mininterval': 0.5, 'leave': False}
+
     def _generate_fraud_indicators(self, leads_df):
         """Generate top fraud indicators from batch."""
-        indicators = []
-
-        # Count fraud reasons
-        all_reasons = []
-        for reasons_str in leads_df['fraud_reasons']:
-            if reasons_str:
-                all_reasons.extend(reasons_str.split(', '))
-
-        if not all_reasons:
-            return indicators
-
-        # Count occurrences
-        reason_counts = pd.Series(all_reasons).value_counts()
-
-        # Map reasons to categories
-        category_map = {
-            'Invalid phone format': 'contact',
-            'Missing phone number': 'contact',
-            'Invalid email format': 'contact',
-            'Missing email address': 'contact',
-            'Disposable email domain': 'contact',
-            'Phone number repeated 3+ times': 'contact',
-            'Email repeated 3+ times': 'contact',
-            'Exact duplicate detected': 'duplicate',
-            'Invalid or gibberish name': 'quality',
-            'Missing critical fields': 'quality'
-        }
+        # Count fraud reasons (splits distinct reason combinations, not every lead)
+        reason_counts = count_reasons(leads_df['fraud_reasons'])
 
-        total_leads = len(leads_df)
-
-        for reason, count in reason_counts.items():
-            percentage = (count / total_leads) * 100
-
-            # Estimate points per lead (this is approximate)
-            points_map = {
-                'Invalid phone format': 10,
-                'Missing phone number': 10,
-                'Invalid email format': 10,
-                'Missing email address': 10,
-                'Disposable email domain': 10,
-                'Phone number repeated 3+ times': 10,
-                'Email repeated 3+ times': 10,
-                'Exact duplicate detected': 15,
-                'Invalid or gibberish name': 10,
-                'Missing critical fields': 10
-            }
+        if reason_counts.empty:
+            return []
 
-            indicator = {
-                'indicator_name': reason,
-                'indicator_category': category_map.get(reason, 'quality'),
-                'affected_lead_count': int(count),
-                'percentage': float(percentage),
-                'points_per_lead': points_map.get(reason, 10),
-                'total_points': int(count * points_map.get(reason, 10))
-            }
+        # Look up every reason at once rather than per reason with dict.get
+        names = reason_counts.index.to_series()
+        counts = reason_counts.to_numpy()
+        points = names.map(INDICATOR_POINTS).fillna(10).astype(int).to_numpy()
 
-            indicators.append(indicator)
+        indicators = pd.DataFrame({
+            'indicator_name': names.to_numpy(),
+            'indicator_category': names.map(INDICATOR_CATEGORIES).fillna('quality').to_numpy(),
+            'affected_lead_count': counts,
+            'percentage': counts / len(leads_df) * 100,
+            'points_per_lead': points,
+            'total_points': counts * points
+        })
 
-        return indicators
+        return indicators.to_dict('records')
 
 
 def main():
@@ -280,6 +328,14 @@ def main():
     parser.add_argument('--cost', '-c', type=float, help='Cost per lead (for refund calculation)')
     parser.add_argument('--batch-id', '-b', help='Batch identifier (optional)')
     parser.add_argument('--no-db', action='store_true', help='Skip database save')
+    parser.add_argument('--insert-batch-size', type=int, default=1000,
+                        help='Leads per database insert request (default: 1000)')
+    parser.add_argument('--insert-concurrency', type=int, default=8,
+                        help='Insert requests in flight at once (default: 8, 1 = sequential)')
+    parser.add_argument('--jobs', '-j', type=int, default=-1,
+                        help='Processes for scoring very large batches (default: -1 = all cores)')
+    parser.add_argument('--csv-only', action='store_true',
+                        help=f'Write lead analysis as CSV (automatic above {LARGE_BATCH_ROWS} leads)')
 
     args = parser.parse_args()
 
@@ -296,13 +352,18 @@ def main():
 
     # Load lead file
     try:
-        leads_df = pd.read_csv(args.input_file)
+        leads_df = read_leads_csv(args.input_file)
     except Exception as e:
         print(f"ERROR: Could not load file: {e}")
         sys.exit(1)
 
     # Initialize scorer
-    scorer = FraudScorerWithDB(save_to_db=not args.no_db)
+    scorer = FraudScorerWithDB(
+        save_to_db=not args.no_db,
+        insert_batch_size=args.insert_batch_size,
+        insert_concurrency=args.insert_concurrency,
+        n_jobs=args.jobs
+    )
 
     # Process batch
     batch_data = scorer.process_batch(
@@ -326,7 +387,8 @@ def main():
     report = generate_summary_report(
         batch_data['leads_df'],
         refund_info,
-        batch_data['total_batch_cost']
+        batch_data['total_batch_cost'],
+        batch_data['analysis_date']
     )
 
     print("\n" + report)
@@ -335,10 +397,19 @@ def main():
     output_file = args.input_file.replace('.csv', '_fraud_analysis.xlsx')
     print(f"\nSaving detailed results to: {output_file}")
 
+    csv_output = args.input_file.replace('.csv', '_fraud_analysis.csv')
+    csv_only = args.csv_only or len(batch_data['leads_df']) > LARGE_BATCH_ROWS
+
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        if csv_only:
+            # CSV skips Excel's zip/XML serialization; the workbook keeps only the summary
+            batch_data['leads_df'].to_csv(csv_output, index=False)
+            print(f"✓ Lead analysis saved to CSV: {csv_output}")
+
+        with excel_writer(output_file) as writer:
             # Main analysis sheet
-            batch_data['leads_df'].to_excel(writer, sheet_name='Lead Analysis', index=False)
+            if not csv_only:
+                batch_data['leads_df'].to_excel(writer, sheet_name='Lead Analysis', index=False)
 
             # Summary sheet
             summary_data = {
@@ -357,7 +428,7 @@ def main():
                 'Value': [
                     args.vendor,
                     batch_data['batch_identifier'],
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    batch_data['analysis_date'].strftime('%Y-%m-%d %H:%M:%S'),
                     refund_info['total_leads'],
                     refund_info['fraudulent_leads'],
                     refund_info['valid_leads'],
@@ -393,13 +464,9 @@ def main():
         print(f"  Vendor ID: {batch_data['vendor_id']}")
         print(f"\nView your results at: https://fifybuzwfaegloijrmqb.supabase.co")
 
-    # Return exit code based on refund status
-    if refund_info['fraud_percentage'] >= 25:
-        sys.exit(2)  # Full refund scenario
-    elif refund_info['fraud_percentage'] >= 15:
-        sys.exit(1)  # Partial refund scenario
-    else:
-        sys.exit(0)  # No refund scenario
+    # Return exit code based on refund status: 2 = full, 1 = partial, 0 = no refund
+    fraud_percentage = refund_info['fraud_percentage']
+    sys.exit(2 if fraud_percentage >= 25 else 1 if fraud_percentage >= 15 else 0)
 
 
 if __name__ == '__main__':
@@ -7,49 +7,405 @@ Wrapper client for interacting with Supabase database to store and retrieve
 fraud analysis data, vendor history, and fraud patterns.
 
 Requirements:
-    pip install supabase python-dotenv
+    pip install supabase python-dotenv pandas
+    pip install "psycopg[binary]"  # optional, COPY-based bulk lead insert
+    pip install orjson  # optional, faster JSON for bulk inserts and paged reads
+    pip install numba  # optional, JIT-compiles the client-side vendor stats for large vendors
 """
 
 import os
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import json
+import time
+import atexit
+import asyncio
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Any
+from urllib.parse import quote
 from dotenv import load_dotenv
+import numpy as np
+import pandas as pd
+import httpx
+from postgrest.types import ReturnMethod
 
 try:
-    from supabase import create_client, Client
+    from supabase import create_client, Client, ClientOptions, PostgrestAPIError
 except ImportError:
     print("ERROR: supabase library not installed. Run: pip install supabase")
     exit(1)
 
+try:
+    from supabase import acreate_client, AsyncClientOptions
+except ImportError:
+    # Older supabase releases have no async client (AsyncAnthonyLeadForensicsDB unavailable)
+    acreate_client = None
+
+try:
+    import psycopg
+except ImportError:
+    # psycopg is optional - without it leads always go through the REST API
+    psycopg = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional - without it bulk inserts and paged reads use the stdlib json module
+    orjson = None
+
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # numba is optional - without it client-side vendor stats use NumPy only
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+# Above this many leads, and with SUPABASE_DB_URL set, create_leads loads them
+# with a single COPY over a direct Postgres connection instead of REST inserts
+COPY_MIN_ROWS = 5000
+
+# One keep-alive HTTP/2 pool per client, sized for concurrent chunked inserts,
+# so REST calls reuse warm connections instead of paying connect + TLS each time
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60)
+# Seconds: the supabase client's own request default, and at most 30 waiting
+# for a free pooled connection
+HTTP_TIMEOUT = httpx.Timeout(120, pool=30)
+
+# Vendor, blacklist and disposable-domain lookups repeat a lot during bulk
+# scoring, so their results are cached in-process for a few minutes
+CACHE_TTL = 300  # seconds
+CACHE_MAXSIZE = 10_000
+
+# Report summaries (vendor summary, refunds, table counts) are cached briefly
+# so repeated reads in one run skip the round trip; writes drop them
+SUMMARY_CACHE_TTL = 60  # seconds
+SUMMARY_KINDS = ('vendor_summary', 'top_fraud_vendors', 'vendor_status_counts',
+                 'refund_summary', 'database_stats', 'overall_summary')
+
+# Client-side vendor stats switch to the compiled one-pass kernel above this
+# many batches (below it, JIT dispatch costs more than it saves)
+STATS_JIT_MIN_BATCHES = 1000
+
+# refund_status -> code for the vendor stats refund counts and _batch_stats_kernel
+# (anything else is -1), so each batch costs one dict lookup
+REFUND_CODES = {'FULL REFUND': 0, 'PARTIAL REFUND': 1, 'NO REFUND': 2}
+
+# Disposable-domain hits are counted locally and written back in one go by
+# the background flusher after this many hits or seconds (and on close/exit)
+DISPOSABLE_FLUSH_HITS = 500
+DISPOSABLE_FLUSH_SECONDS = 10
+
+# log_api_call rows are buffered and inserted together by a background thread
+# every this many seconds, or as soon as this many rows are waiting
+LOG_FLUSH_ROWS = 500
+LOG_FLUSH_SECONDS = 1.0
+
+# Tables counted by get_database_stats
+STATS_TABLES = ['vendors', 'batches', 'leads', 'fraud_blacklist',
+                'disposable_email_domains', 'api_validation_log']
+# Counted from the planner's row estimate (too large to count exactly on
+# every report); the rest are exact. The overall_summary SQL function
+# counts the same way, so both paths report the same numbers.
+PLANNED_COUNT_TABLES = {'leads', 'api_validation_log'}
+
+# Multi-value lead searches send at most this many values per in.() filter,
+# keeping request URLs well under proxy query-string limits
+SEARCH_CHUNK = 500
+SEARCH_WORKERS = 8
+
+# Error codes (PostgREST schema cache, then Postgres) meaning a SQL function or
+# a view/table is not deployed yet. Only these switch a server-side aggregate
+# to its client-side fallback; any other error (permissions, timeouts, bad
+# columns) is raised rather than turned into a full download.
+MISSING_FUNCTION_CODES = {'PGRST202', '42883'}
+MISSING_RELATION_CODES = {'PGRST205', '42P01'}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Supabase connection settings from the environment (secrets kept out of repr)."""
+    url: Optional[str]
+    service_role_key: Optional[str] = field(repr=False)
+    anon_key: Optional[str] = field(repr=False)
+    db_url: Optional[str] = field(repr=False)
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        return cls(
+            url=os.getenv('SUPABASE_URL'),
+            service_role_key=os.getenv('SUPABASE_SERVICE_ROLE_KEY'),
+            anon_key=os.getenv('SUPABASE_ANON_KEY'),
+            db_url=os.getenv('SUPABASE_DB_URL')
+        )
+
+
+# Load environment variables once per process (variables already set win over .env)
+load_dotenv()
+SETTINGS = Settings.from_env()
+
+
+def _load_credentials(url: str = None, key: str = None):
+    """Resolve the Supabase URL and key from the arguments or SETTINGS."""
+    url = url or SETTINGS.url
+    key = key or SETTINGS.service_role_key or SETTINGS.anon_key
+
+    if not url or not key:
+        raise ValueError(
+            "Supabase credentials not found. "
+            "Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY in .env file"
+        )
+    return url, key
+
+
+def _insert_request(postgrest, table: str, rows: List[Dict[str, Any]], returning: ReturnMethod):
+    """URL, orjson-encoded body and headers for a PostgREST insert."""
+    return (
+        f"{postgrest.base_url}/{table}",
+        orjson.dumps(rows, option=orjson.OPT_SERIALIZE_NUMPY),
+        {**postgrest.headers, 'Content-Type': 'application/json', 'Prefer': f'return={returning.value}'}
+    )
+
+
+def _rest_response(response: httpx.Response) -> List[Dict[str, Any]]:
+    """Decode a PostgREST response (with orjson when installed), raising on errors."""
+    try:
+        body = (orjson or json).loads(response.content) if response.content else []
+    except ValueError:
+        body = {'message': response.text}
+
+    if response.is_error:
+        raise PostgrestAPIError(body)
+    return body
+
+
+@njit(cache=True)
+def _batch_stats_kernel(fraud_percentage, refund_code, refund_amount):
+    """
+    Fraud and refund statistics over a vendor's batches (newest first) in one pass.
+
+    Args:
+        fraud_percentage: float64 array, NaN where missing
+        refund_code: int8 array of REFUND_CODES values (-1 for other statuses)
+        refund_amount: float64 array, NaN where missing
+
+    Returns:
+        (mean, max, min, sample std, full, partial, no refunds, total refunded,
+        mean of the first three) - NaN where there is nothing to average
+    """
+    scored = 0
+    mean = 0.0
+    sum_sq = 0.0
+    high = -np.inf
+    low = np.inf
+    recent_total = 0.0
+    recent_scored = 0
+    refunds = np.zeros(3, dtype=np.int64)
+    total_refunded = 0.0
+
+    for i in range(fraud_percentage.shape[0]):
+        value = fraud_percentage[i]
+        if not np.isnan(value):
+            # Welford's update keeps the variance stable in a single pass
+            scored += 1
+            delta = value - mean
+            mean += delta / scored
+            sum_sq += delta * (value - mean)
+            high = max(high, value)
+            low = min(low, value)
+            if i < 3:
+                recent_total += value
+                recent_scored += 1
+
+        if refund_code[i] >= 0:
+            refunds[refund_code[i]] += 1
+        if not np.isnan(refund_amount[i]):
+            total_refunded += refund_amount[i]
+
+    if scored == 0:
+        mean = high = low = np.nan
+    std = np.sqrt(sum_sq / (scored - 1)) if scored > 1 else np.nan
+    recent = recent_total / recent_scored if recent_scored else np.nan
+
+    return mean, high, low, std, refunds[0], refunds[1], refunds[2], total_refunded, recent
+
+
+def _stop_flusher_at_exit(db_ref: weakref.ref):
+    """atexit hook: flush a client's pending API logs and disposable hits if it is still alive."""
+    db = db_ref()
+    if db is not None:
+        db._stop_flusher()
+
+
+def _new_vendor(vendor_name: str, **kwargs) -> Dict[str, Any]:
+    """Fields for a new vendor record (first_batch_date defaults to now() in the DB)."""
+    return {
+        'vendor_name': vendor_name,
+        'vendor_email': kwargs.get('vendor_email'),
+        'vendor_phone': kwargs.get('vendor_phone'),
+        'vendor_status': 'active'
+    }
+
+
+def _set_batch_defaults(batch_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in analysis fields for a new batch (analysis_date defaults to now() in the DB)."""
+    batch_data.setdefault('analysis_version', '2.0')
+    batch_data.setdefault('analyst_name', 'Anthony Lead Forensics')
+    return batch_data
+
 
 class AnthonyLeadForensicsDB:
     """
     Database client for Anthony Lead Forensics fraud detection system.
+
+    Each instance owns a connection pool, so share one instance per process
+    rather than creating one per call; close() releases the pool.
     """
 
-    def __init__(self, url: str = None, key: str = None):
+    def __init__(self, url: str = None, key: str = None, db_url: str = None,
+                 http_limits: httpx.Limits = HTTP_LIMITS):
         """
         Initialize Supabase client.
 
         Args:
             url: Supabase project URL (or load from env)
             key: Supabase anon/service key (or load from env)
+            db_url: Optional direct Postgres connection string for COPY bulk
+                loads (or load SUPABASE_DB_URL from env)
+            http_limits: Connection pool bounds (CLI tools issuing a few
+                sequential queries can hold far fewer than bulk loads)
         """
-        # Load environment variables
-        load_dotenv()
-
         # Get credentials
-        self.url = url or os.getenv('SUPABASE_URL')
-        self.key = key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+        self.url, self.key = _load_credentials(url, key)
+        self.db_url = db_url or SETTINGS.db_url
+
+        # Initialize client on a persistent connection pool
+        self.http = httpx.Client(
+            transport=httpx.HTTPTransport(http2=True, retries=2, limits=http_limits),
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True
+        )
+        self.client: Client = create_client(self.url, self.key, ClientOptions(httpx_client=self.http))
+
+        # Hot single-row lookups skip the query builder: their URLs are built
+        # once here and only the quoted values are filled in per call
+        rest_url = self.client.postgrest.base_url
+        self._vendor_by_id_url = f"{rest_url}/vendors?select=*&id=eq.{{}}"
+        self._vendor_by_name_url = f"{rest_url}/vendors?select=*&vendor_name=eq.{{}}"
+        self._blacklist_url = (f"{rest_url}/fraud_blacklist?select=*"
+                               f"&blacklist_type=eq.{{}}&value=eq.{{}}&is_active=eq.true")
+
+        # Lookup cache: (kind, *args) -> (expires_at, value)
+        self._cache: Dict[tuple, tuple] = {}
+
+        # Disposable-domain hits not yet written to times_detected, and their total
+        self._disposable_hits = Counter()
+        self._disposable_hit_count = 0
+        self._disposable_flushed_at = time.monotonic()
+
+        # API call logs waiting for the flusher thread; it also writes back the
+        # disposable hits, and is started on the first log or hit
+        self._log_buf: List[Dict[str, Any]] = []
+        self._flush_lock = threading.Lock()
+        self._flush_wake = threading.Event()
+        self._flush_thread = None
+        # Set by close(): later logs and hits raise instead of restarting the flusher
+        self._closed = False
+
+        # COPY needs psycopg and a direct database connection string
+        self.copy_enabled = bool(psycopg and self.db_url)
+
+    def close(self):
+        """Write back pending logs and disposable-domain hits, then close the HTTP connection pool."""
+        self._stop_flusher()
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _cached(self, key: tuple, fetch, ttl: float = CACHE_TTL):
+        """Return the cached value for key, calling fetch() when missing or older than ttl."""
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+
+        value = fetch()
+        if len(self._cache) >= CACHE_MAXSIZE:
+            # Evict the oldest entry (dicts keep insertion order; pop tolerates
+            # a concurrent caller evicting the same one)
+            self._cache.pop(next(iter(self._cache)), None)
+        self._cache.pop(key, None)
+        self._cache[key] = (now + ttl, value)
+        return value
+
+    def _insert(self, table: str, rows: List[Dict[str, Any]],
+                returning: ReturnMethod = ReturnMethod.representation) -> List[Dict[str, Any]]:
+        """Insert rows, encoding the payload with orjson when it is installed."""
+        if orjson is None:
+            return self.client.table(table).insert(rows, returning=returning).execute().data
+
+        url, content, headers = _insert_request(self.client.postgrest, table, rows, returning)
+        return _rest_response(self.http.post(url, content=content, headers=headers))
+
+    def _get_one(self, url_template: str, *values) -> Optional[Dict[str, Any]]:
+        """GET the first row from a prebuilt lookup URL, filled with the URL-quoted values."""
+        url = url_template.format(*(quote(str(value), safe='') for value in values))
+        rows = _rest_response(self.http.get(url, headers=self.client.postgrest.headers))
+        return rows[0] if rows else None
+
+    def _iter_rows(self, table: str, columns: str, page: int = 1000,
+                   **filters) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every row of table matching the eq filters, one page at a time.
 
-        if not self.url or not self.key:
-            raise ValueError(
-                "Supabase credentials not found. "
-                "Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY in .env file"
-            )
+        Pages are read in id order starting after the last id seen (columns
+        must include id), so deep pages cost no more than the first. They are
+        fetched on the pooled HTTP client and decoded by _rest_response
+        (orjson when installed) rather than postgrest's pydantic validation,
+        several times slower on large pages.
+        """
+        url = f"{self.client.postgrest.base_url}/{table}"
+        # Whitespace stripped from the select list, as the query builder does
+        params = {'select': columns.replace(' ', ''), 'order': 'id', 'limit': page}
+        for column, value in filters.items():
+            # PostgREST spells booleans in lower case
+            params[column] = f"eq.{str(value).lower() if isinstance(value, bool) else value}"
+
+        last_id = None
+        while True:
+            if last_id:
+                params['id'] = f"gt.{last_id}"
+
+            rows = _rest_response(self.http.get(url, params=params, headers=self.client.postgrest.headers))
+            yield from rows
+
+            if len(rows) < page:
+                return
+            last_id = rows[-1]['id']
+
+    def _invalidate(self, kind: str, *args):
+        """Drop the cached entry for (kind, *args), or every entry of kind if no args."""
+        if args:
+            self._cache.pop((kind, *args), None)
+        else:
+            for key in [key for key in self._cache if key[0] == kind]:
+                del self._cache[key]
 
-        # Initialize client
-        self.client: Client = create_client(self.url, self.key)
+    def _invalidate_summaries(self):
+        """Drop cached report summaries after a write."""
+        for kind in SUMMARY_KINDS:
+            self._invalidate(kind)
 
     # =========================================================================
     # VENDOR OPERATIONS
@@ -66,33 +422,31 @@ class AnthonyLeadForensicsDB:
         Returns:
             Vendor record dict
         """
-        # Try to get existing vendor
-        result = self.client.table('vendors').select('*').eq('vendor_name', vendor_name).execute()
-
-        if result.data:
-            return result.data[0]
-
-        # Create new vendor
-        vendor_data = {
-            'vendor_name': vendor_name,
-            'vendor_email': kwargs.get('vendor_email'),
-            'vendor_phone': kwargs.get('vendor_phone'),
-            'first_batch_date': datetime.now().isoformat(),
-            'vendor_status': 'active'
-        }
+        # Try to get existing vendor (cached)
+        vendor = self.get_vendor_by_name(vendor_name)
+        if vendor:
+            return vendor
+
+        # Create new vendor; ON CONFLICT DO NOTHING keeps concurrent callers
+        # from failing on the unique vendor_name
+        result = self.client.table('vendors')\
+            .upsert(_new_vendor(vendor_name, **kwargs), on_conflict='vendor_name', ignore_duplicates=True)\
+            .execute()
+        self._invalidate('vendor_by_name', vendor_name)
+        self._invalidate_summaries()
 
-        result = self.client.table('vendors').insert(vendor_data).execute()
-        return result.data[0]
+        # No row back means another caller created it first
+        return result.data[0] if result.data else self.get_vendor_by_name(vendor_name)
 
     def get_vendor_by_id(self, vendor_id: str) -> Optional[Dict[str, Any]]:
-        """Get vendor by UUID."""
-        result = self.client.table('vendors').select('*').eq('id', vendor_id).execute()
-        return result.data[0] if result.data else None
+        """Get vendor by UUID (cached for CACHE_TTL seconds)."""
+        return self._cached(('vendor_by_id', vendor_id),
+                            lambda: self._get_one(self._vendor_by_id_url, vendor_id))
 
     def get_vendor_by_name(self, vendor_name: str) -> Optional[Dict[str, Any]]:
-        """Get vendor by name."""
-        result = self.client.table('vendors').select('*').eq('vendor_name', vendor_name).execute()
-        return result.data[0] if result.data else None
+        """Get vendor by name (cached for CACHE_TTL seconds)."""
+        return self._cached(('vendor_by_name', vendor_name),
+                            lambda: self._get_one(self._vendor_by_name_url, vendor_name))
 
     def update_vendor_status(self, vendor_id: str, status: str, notes: str = None):
         """
@@ -107,17 +461,45 @@ class AnthonyLeadForensicsDB:
         if notes:
             update_data['notes'] = notes
 
-        self.client.table('vendors').update(update_data).eq('id', vendor_id).execute()
+        self.client.table('vendors').update(update_data, returning=ReturnMethod.minimal).eq('id', vendor_id).execute()
+        self._invalidate('vendor_by_id', vendor_id)
+        self._invalidate('vendor_by_name')
+        self._invalidate_summaries()
+
+    def get_vendor_fraud_history(self, vendor_id: str, columns: str = '*') -> List[Dict[str, Any]]:
+        """
+        Get all batches for a vendor ordered by date.
 
-    def get_vendor_fraud_history(self, vendor_id: str) -> List[Dict[str, Any]]:
-        """Get all batches for a vendor ordered by date."""
+        Args:
+            vendor_id: Vendor UUID
+            columns: PostgREST select list (default: whole rows)
+        """
         result = self.client.table('batches')\
-            .select('*')\
+            .select(columns)\
             .eq('vendor_id', vendor_id)\
             .order('batch_date', desc=True)\
             .execute()
         return result.data
 
+    def get_vendor_with_batches(self, vendor_name: str, batch_columns: str = '*') -> Optional[Dict[str, Any]]:
+        """
+        Get a vendor by name together with its batch history in one request.
+
+        Args:
+            vendor_name: Vendor name
+            batch_columns: PostgREST select list for the batches (default: whole rows)
+
+        Returns:
+            Vendor record dict with a 'batches' list (newest first, as from
+            get_vendor_fraud_history), or None if not found
+        """
+        result = self.client.table('vendors')\
+            .select(f'*, batches({batch_columns})')\
+            .eq('vendor_name', vendor_name)\
+            .order('batch_date', desc=True, foreign_table='batches')\
+            .execute()
+        return result.data[0] if result.data else None
+
     # =========================================================================
     # BATCH OPERATIONS
     # =========================================================================
@@ -138,14 +520,37 @@ class AnthonyLeadForensicsDB:
         Returns:
             Created batch record
         """
-        # Set defaults
-        batch_data.setdefault('analysis_date', datetime.now().isoformat())
-        batch_data.setdefault('analysis_version', '2.0')
-        batch_data.setdefault('analyst_name', 'Anthony Lead Forensics')
-
-        result = self.client.table('batches').insert(batch_data).execute()
+        result = self.client.table('batches').insert(_set_batch_defaults(batch_data)).execute()
+        self._invalidate_summaries()
         return result.data[0]
 
+    def save_fraud_batch(self, vendor_name: str, batch_data: Dict[str, Any],
+                         leads_data: List[Dict[str, Any]],
+                         indicators: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Save a whole analyzed batch in one transaction (save_fraud_batch RPC).
+
+        Gets or creates the vendor, then inserts the batch, its leads and its
+        fraud indicators server-side, so either everything is saved or nothing.
+
+        Args:
+            vendor_name: Vendor name
+            batch_data: Batch fields (as for create_batch, without vendor_id)
+            leads_data: Lead dicts (as for create_leads, without batch_id)
+            indicators: Indicator dicts (as for create_fraud_indicators)
+
+        Returns:
+            Dict with vendor_id and batch_id
+        """
+        result = self.client.rpc('save_fraud_batch', {
+            'p_vendor_name': vendor_name,
+            'p_batch': batch_data,
+            'p_leads': leads_data,
+            'p_indicators': indicators
+        }).execute()
+        self._invalidate_summaries()
+        return result.data
+
     def get_batch_by_id(self, batch_id: str) -> Optional[Dict[str, Any]]:
         """Get batch by UUID."""
         result = self.client.table('batches').select('*').eq('id', batch_id).execute()
@@ -153,12 +558,21 @@ class AnthonyLeadForensicsDB:
 
     def update_batch(self, batch_id: str, update_data: Dict[str, Any]):
         """Update batch record."""
-        self.client.table('batches').update(update_data).eq('id', batch_id).execute()
+        self.client.table('batches').update(update_data, returning=ReturnMethod.minimal).eq('id', batch_id).execute()
+        self._invalidate_summaries()
 
-    def get_high_fraud_batches(self, threshold: float = 25.0, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get batches with fraud rate above threshold."""
+    def get_high_fraud_batches(self, threshold: float = 25.0, limit: int = 50,
+                               columns: str = '*') -> List[Dict[str, Any]]:
+        """
+        Get batches with fraud rate above threshold.
+
+        Args:
+            threshold: Minimum fraud_percentage
+            limit: Maximum number of batches
+            columns: PostgREST select list for the batch (vendor_name is always embedded)
+        """
         result = self.client.table('batches')\
-            .select('*, vendors(vendor_name)')\
+            .select(f'{columns}, vendors(vendor_name)')\
             .gte('fraud_percentage', threshold)\
             .order('batch_date', desc=True)\
             .limit(limit)\
@@ -178,44 +592,83 @@ class AnthonyLeadForensicsDB:
     # LEAD OPERATIONS
     # =========================================================================
 
-    def create_leads(self, leads_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def create_leads(self, leads_data: List[Dict[str, Any]], chunk_size: int = 1000,
+                     return_rows: bool = True) -> List[Dict[str, Any]]:
         """
         Bulk insert leads.
 
+        Large batches are loaded with COPY when copy_enabled (see COPY_MIN_ROWS).
+
         Args:
             leads_data: List of lead dicts with fraud scores and details
+            chunk_size: Leads per insert request
+            return_rows: Send the created records back (False skips that response body)
 
         Returns:
-            List of created lead records
+            List of created lead records (empty when loaded with COPY or not return_rows)
         """
-        # Supabase has a limit on bulk inserts (typically 1000)
-        # Split into chunks if needed
-        chunk_size = 500
+        if self.copy_enabled and len(leads_data) > COPY_MIN_ROWS:
+            columns = list(leads_data[0])
+            self.copy_rows('leads', columns, (tuple(lead.get(c) for c in columns) for lead in leads_data))
+            self._invalidate_summaries()
+            return []
+
+        # PostgREST throughput plateaus around 1k-10k rows per request and
+        # very large payloads hit the request size limit, so insert in chunks
         all_results = []
+        returning = ReturnMethod.representation if return_rows else ReturnMethod.minimal
 
         for i in range(0, len(leads_data), chunk_size):
             chunk = leads_data[i:i + chunk_size]
-            result = self.client.table('leads').insert(chunk).execute()
-            all_results.extend(result.data)
+            all_results.extend(self._insert('leads', chunk, returning))
 
+        self._invalidate_summaries()
         return all_results
 
+    def copy_rows(self, table: str, columns: List[str], rows) -> None:
+        """
+        Load rows into a table with one COPY FROM STDIN (requires copy_enabled).
+
+        Args:
+            table: Table name
+            columns: Column names, in the order of each row's values
+            rows: Iterable of value tuples
+        """
+        with psycopg.connect(self.db_url) as conn:
+            with conn.cursor() as cur:
+                with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+
+    def iter_leads_by_batch(self, batch_id: str, fraudulent_only: bool = False,
+                            page: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the leads of a batch, fetching one page at a time.
+
+        Pages are read in id order starting after the last id seen, so memory
+        stays bounded and deep pages cost no more than the first.
+
+        Args:
+            batch_id: Batch UUID
+            fraudulent_only: Only yield leads flagged as fraudulent
+            page: Leads per request (at most the API's max rows, 1000 by default)
+
+        Yields:
+            Lead record dicts
+        """
+        filters = {'batch_id': batch_id}
+        if fraudulent_only:
+            filters['is_fraudulent'] = True
+
+        return self._iter_rows('leads', '*', page, **filters)
+
     def get_leads_by_batch(self, batch_id: str) -> List[Dict[str, Any]]:
         """Get all leads for a batch."""
-        result = self.client.table('leads')\
-            .select('*')\
-            .eq('batch_id', batch_id)\
-            .execute()
-        return result.data
+        return list(self.iter_leads_by_batch(batch_id))
 
     def get_fraudulent_leads_by_batch(self, batch_id: str) -> List[Dict[str, Any]]:
         """Get only fraudulent leads for a batch."""
-        result = self.client.table('leads')\
-            .select('*')\
-            .eq('batch_id', batch_id)\
-            .eq('is_fraudulent', True)\
-            .execute()
-        return result.data
+        return list(self.iter_leads_by_batch(batch_id, fraudulent_only=True))
 
     def search_leads_by_email(self, email: str) -> List[Dict[str, Any]]:
         """Search for leads by email across all batches."""
@@ -233,6 +686,36 @@ class AnthonyLeadForensicsDB:
             .execute()
         return result.data
 
+    def search_leads_by_emails(self, emails: List[str]) -> List[Dict[str, Any]]:
+        """
+        Search for leads matching any of the emails across all batches.
+
+        One query per SEARCH_CHUNK emails (run concurrently) instead of one
+        per email; group the returned rows by 'lead_email' as needed.
+        """
+        return self._search_leads('lead_email', emails)
+
+    def search_leads_by_phones(self, phones: List[str]) -> List[Dict[str, Any]]:
+        """Search for leads matching any of the phones across all batches (see search_leads_by_emails)."""
+        return self._search_leads('lead_phone', phones)
+
+    def _search_leads(self, column: str, values: List[str]) -> List[Dict[str, Any]]:
+        """Fetch leads whose column is in values, SEARCH_CHUNK values per request."""
+        values = list(dict.fromkeys(v for v in values if v))
+
+        def search(chunk):
+            return self.client.table('leads')\
+                .select('*, batches(batch_identifier, vendor_id)')\
+                .in_(column, chunk)\
+                .execute().data
+
+        chunks = [values[i:i + SEARCH_CHUNK] for i in range(0, len(values), SEARCH_CHUNK)]
+        if len(chunks) <= 1:
+            return search(chunks[0]) if chunks else []
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), SEARCH_WORKERS)) as executor:
+            return [lead for found in executor.map(search, chunks) for lead in found]
+
     # =========================================================================
     # FRAUD INDICATOR OPERATIONS
     # =========================================================================
@@ -249,7 +732,7 @@ class AnthonyLeadForensicsDB:
         for indicator in indicators:
             indicator['batch_id'] = batch_id
 
-        self.client.table('batch_fraud_indicators').insert(indicators).execute()
+        self._insert('batch_fraud_indicators', indicators, ReturnMethod.minimal)
 
     def get_fraud_indicators(self, batch_id: str) -> List[Dict[str, Any]]:
         """Get fraud indicators for a batch."""
@@ -262,18 +745,41 @@ class AnthonyLeadForensicsDB:
 
     def get_top_fraud_indicators_overall(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get most common fraud indicators across all batches."""
+        # Aggregated and limited server-side by the fraud_indicator_frequency view
+        try:
+            result = self.client.table('fraud_indicator_frequency')\
+                .select('indicator_name, indicator_category, times_detected')\
+                .order('times_detected', desc=True)\
+                .limit(limit)\
+                .execute()
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_RELATION_CODES:
+                raise
+            # View not deployed yet
+            return self._count_fraud_indicators(limit)
+
+        return [
+            {'indicator_name': item['indicator_name'],
+             'indicator_category': item['indicator_category'],
+             'count': item['times_detected']}
+            for item in result.data
+        ]
+
+    def _count_fraud_indicators(self, limit: int) -> List[Dict[str, Any]]:
+        """Client-side fallback for get_top_fraud_indicators_overall."""
         result = self.client.table('batch_fraud_indicators')\
             .select('indicator_name, indicator_category')\
             .execute()
 
-        # Aggregate manually (Supabase free tier doesn't support all aggregations)
-        from collections import Counter
-        indicators = Counter((item['indicator_name'], item['indicator_category']) for item in result.data)
+        # Aggregate with pandas (Supabase free tier doesn't support all aggregations);
+        # groups keep first-seen order so ties rank as before
+        df = pd.DataFrame(result.data, columns=['indicator_name', 'indicator_category'])
+        top = df.groupby(['indicator_name', 'indicator_category'], dropna=False, sort=False)\
+            .size()\
+            .nlargest(limit)\
+            .reset_index(name='count')
 
-        return [
-            {'indicator_name': name, 'indicator_category': category, 'count': count}
-            for (name, category), count in indicators.most_common(limit)
-        ]
+        return top.astype(object).where(top.notna(), None).to_dict('records')
 
     # =========================================================================
     # API VALIDATION LOG
@@ -293,10 +799,16 @@ class AnthonyLeadForensicsDB:
             success: Whether call succeeded
             api_cost: Cost of the API call
             error_message: Error message if failed
+
+        The row is buffered and inserted in bulk by a background thread
+        (see LOG_FLUSH_ROWS / LOG_FLUSH_SECONDS); close() writes what is left,
+        and logging on a closed client raises RuntimeError.
         """
         log_data = {
             'lead_id': lead_id,
             'api_service': api_service,
+            # Set here rather than by the column default: the row is only
+            # inserted when the buffer is next flushed
             'request_timestamp': datetime.now().isoformat(),
             'request_data': request_data,
             'response_data': response_data,
@@ -305,7 +817,60 @@ class AnthonyLeadForensicsDB:
             'error_message': error_message
         }
 
-        self.client.table('api_validation_log').insert(log_data).execute()
+        with self._flush_lock:
+            self._start_flusher('log_api_call')
+            self._log_buf.append(log_data)
+            if len(self._log_buf) >= LOG_FLUSH_ROWS:
+                self._flush_wake.set()
+
+    def _start_flusher(self, caller: str):
+        """Start the flusher thread if needed (call with _flush_lock held); raise once closed."""
+        if self._closed:
+            raise RuntimeError(f"{caller}() on a closed AnthonyLeadForensicsDB")
+        if self._flush_thread is None:
+            self._flush_thread = threading.Thread(target=self._run_flusher, daemon=True)
+            self._flush_thread.start()
+            # Started once per client; the weakref lets the client be
+            # collected after close() instead of living until exit
+            atexit.register(_stop_flusher_at_exit, weakref.ref(self))
+
+    def flush_api_logs(self):
+        """Insert all buffered API call logs (LOG_FLUSH_ROWS per request)."""
+        with self._flush_lock:
+            logs, self._log_buf = self._log_buf, []
+        if not logs:
+            return
+
+        for i in range(0, len(logs), LOG_FLUSH_ROWS):
+            chunk = logs[i:i + LOG_FLUSH_ROWS]
+            try:
+                self._insert('api_validation_log', chunk, returning=ReturnMethod.minimal)
+            except Exception as e:
+                print(f"WARNING: Could not save {len(chunk)} API log records: {e}")
+
+    def _run_flusher(self):
+        """
+        Background loop: flush logs every LOG_FLUSH_SECONDS or when woken, and
+        disposable hits once DISPOSABLE_FLUSH_HITS or _SECONDS is reached.
+        """
+        while self._flush_thread is not None:
+            self._flush_wake.wait(LOG_FLUSH_SECONDS)
+            self._flush_wake.clear()
+            self.flush_api_logs()
+            if (self._disposable_hit_count >= DISPOSABLE_FLUSH_HITS
+                    or time.monotonic() - self._disposable_flushed_at >= DISPOSABLE_FLUSH_SECONDS):
+                self._flush_disposable_hits_safely()
+
+    def _stop_flusher(self):
+        """Stop the flusher thread (if running), refuse further logs and hits, and flush what is left."""
+        with self._flush_lock:
+            thread, self._flush_thread = self._flush_thread, None
+            self._closed = True
+        if thread is not None:
+            self._flush_wake.set()
+            thread.join()
+        self.flush_api_logs()
+        self._flush_disposable_hits_safely()
 
     def get_api_logs_by_lead(self, lead_id: str) -> List[Dict[str, Any]]:
         """Get all API logs for a lead."""
@@ -318,25 +883,38 @@ class AnthonyLeadForensicsDB:
 
     def get_api_cost_summary(self, batch_id: str = None) -> Dict[str, float]:
         """Get total API costs for a batch or overall."""
-        query = self.client.table('api_validation_log').select('api_service, api_cost')
-
-        if batch_id:
-            # Need to join through leads table
-            query = query.eq('leads.batch_id', batch_id)
-
-        result = query.execute()
+        # Summed per service server-side by the api_cost_summary function
+        try:
+            rows = self.client.rpc('api_cost_summary', {'p_batch': batch_id}).execute().data
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # Function not deployed yet
+            rows = self._list_api_costs(batch_id)
 
         # Calculate costs by service
         costs = {'twilio': 0.0, 'zerobounce': 0.0, 'ipqualityscore': 0.0, 'total': 0.0}
-        for log in result.data:
-            service = log['api_service']
-            cost = log['api_cost'] or 0.0
+        for row in rows:
+            service = row['api_service']
+            cost = float(row['total_cost'] or 0.0)
             if service in costs:
                 costs[service] += cost
             costs['total'] += cost
 
         return costs
 
+    def _list_api_costs(self, batch_id: str = None) -> List[Dict[str, Any]]:
+        """Client-side fallback for get_api_cost_summary: one row per API call."""
+        if batch_id:
+            # Filtering on an embedded table needs an inner join to drop other batches
+            query = self.client.table('api_validation_log')\
+                .select('api_service, total_cost:api_cost, leads!inner(batch_id)')\
+                .eq('leads.batch_id', batch_id)
+        else:
+            query = self.client.table('api_validation_log').select('api_service, total_cost:api_cost')
+
+        return query.execute().data
+
     # =========================================================================
     # BLACKLIST OPERATIONS
     # =========================================================================
@@ -351,52 +929,44 @@ class AnthonyLeadForensicsDB:
             reason: Reason for blacklisting
 
         Returns:
-            Blacklist record
+            The blacklist entry (re-read after the write, and cached for
+            check_blacklist)
         """
-        # Check if already exists
-        result = self.client.table('fraud_blacklist')\
-            .select('*')\
-            .eq('blacklist_type', blacklist_type)\
-            .eq('value', value)\
-            .execute()
+        # add_to_blacklist SQL function: insert, or bump times_detected and
+        # reactivate the existing entry, atomically in one round trip
+        self.client.rpc('add_to_blacklist', {
+            'p_type': blacklist_type,
+            'p_value': value,
+            'p_reason': reason
+        }).execute()
+        self._invalidate('blacklist', blacklist_type, value)
+        self._invalidate('active_blacklist')
+        self._invalidate_summaries()
+
+        return self._cached(('blacklist', blacklist_type, value),
+                            lambda: self._get_one(self._blacklist_url, blacklist_type, value))
 
-        if result.data:
-            # Update times_detected
-            existing = result.data[0]
-            self.client.table('fraud_blacklist')\
-                .update({
-                    'times_detected': existing['times_detected'] + 1,
-                    'last_detected': datetime.now().isoformat(),
-                    'is_active': True
-                })\
-                .eq('id', existing['id'])\
-                .execute()
-            return existing
-
-        # Create new
-        blacklist_data = {
-            'blacklist_type': blacklist_type,
-            'value': value,
-            'reason': reason,
-            'times_detected': 1,
-            'first_detected': datetime.now().isoformat(),
-            'last_detected': datetime.now().isoformat(),
-            'is_active': True
-        }
+    def check_blacklist(self, blacklist_type: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        Check if a value is in the blacklist.
 
-        result = self.client.table('fraud_blacklist').insert(blacklist_data).execute()
-        return result.data[0]
+        Values are first checked against a local set of every active entry
+        (reloaded every CACHE_TTL seconds), so the usual miss needs no request;
+        only hits fetch the full entry, which is cached as well.
+        """
+        if (blacklist_type, value) not in self._active_blacklist():
+            return None
 
-    def check_blacklist(self, blacklist_type: str, value: str) -> Optional[Dict[str, Any]]:
-        """Check if a value is in the blacklist."""
-        result = self.client.table('fraud_blacklist')\
-            .select('*')\
-            .eq('blacklist_type', blacklist_type)\
-            .eq('value', value)\
-            .eq('is_active', True)\
-            .execute()
+        return self._cached(('blacklist', blacklist_type, value),
+                            lambda: self._get_one(self._blacklist_url, blacklist_type, value))
 
-        return result.data[0] if result.data else None
+    def _active_blacklist(self) -> set:
+        """(blacklist_type, value) of every active blacklist entry (cached)."""
+        def fetch():
+            rows = self._iter_rows('fraud_blacklist', 'id, blacklist_type, value', is_active=True)
+            return {(row['blacklist_type'], row['value']) for row in rows}
+
+        return self._cached(('active_blacklist',), fetch)
 
     def get_blacklist(self, blacklist_type: str = None) -> List[Dict[str, Any]]:
         """Get all blacklist entries, optionally filtered by type."""
@@ -413,25 +983,81 @@ class AnthonyLeadForensicsDB:
     # =========================================================================
 
     def is_disposable_email(self, domain: str) -> bool:
-        """Check if email domain is disposable."""
+        """
+        Check if email domain is disposable.
+
+        Domains are checked against a local set of every active disposable
+        domain (reloaded every CACHE_TTL seconds), so no request is made per
+        lookup; hits are counted locally and written to times_detected in
+        batches by the background flusher (see flush_disposable_hits).
+        """
+        domain = domain.lower()
+
+        if domain not in self._active_disposable_domains():
+            return False
+
+        self._touch_disposable(domain)
+        return True
+
+    def _active_disposable_domains(self) -> set:
+        """Every active disposable email domain (cached)."""
+        def fetch():
+            rows = self._iter_rows('disposable_email_domains', 'id, domain', is_active=True)
+            return {row['domain'] for row in rows}
+
+        return self._cached(('active_disposable_domains',), fetch)
+
+    def _touch_disposable(self, domain: str):
+        """Count a hit on a disposable domain; the flusher thread writes them back."""
+        with self._flush_lock:
+            self._start_flusher('is_disposable_email')
+            self._disposable_hits[domain] += 1
+            self._disposable_hit_count += 1
+            if self._disposable_hit_count >= DISPOSABLE_FLUSH_HITS:
+                self._flush_wake.set()
+
+    def flush_disposable_hits(self):
+        """Add the locally counted disposable-domain hits to times_detected."""
+        with self._flush_lock:
+            hits, self._disposable_hits = self._disposable_hits, Counter()
+            self._disposable_hit_count = 0
+            self._disposable_flushed_at = time.monotonic()
+        if not hits:
+            return
+
+        # touch_disposable SQL function: one atomic increment for all domains
+        try:
+            self.client.rpc('touch_disposable', {
+                'p_domains': list(hits),
+                'p_hits': list(hits.values())
+            }).execute()
+            return
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # Function not deployed yet - read-modify-write each domain
+
         result = self.client.table('disposable_email_domains')\
-            .select('*')\
-            .eq('domain', domain.lower())\
-            .eq('is_active', True)\
+            .select('domain, times_detected')\
+            .in_('domain', list(hits))\
             .execute()
 
-        if result.data:
-            # Update times_detected
+        now = datetime.now().isoformat()
+        for row in result.data:
             self.client.table('disposable_email_domains')\
                 .update({
-                    'times_detected': result.data[0]['times_detected'] + 1,
-                    'last_detected': datetime.now().isoformat()
-                })\
-                .eq('domain', domain.lower())\
+                    'times_detected': (row['times_detected'] or 0) + hits[row['domain']],
+                    'last_detected': now
+                }, returning=ReturnMethod.minimal)\
+                .eq('domain', row['domain'])\
                 .execute()
-            return True
 
-        return False
+    def _flush_disposable_hits_safely(self):
+        """flush_disposable_hits for the flusher thread and close: warn instead of raising."""
+        try:
+            self.flush_disposable_hits()
+        except Exception as e:
+            print(f"WARNING: Could not save disposable-domain hits: {e}")
 
     def add_disposable_domain(self, domain: str, source: str = 'manual'):
         """Add a new disposable email domain."""
@@ -443,62 +1069,297 @@ class AnthonyLeadForensicsDB:
         }
 
         self.client.table('disposable_email_domains')\
-            .insert(domain_data)\
+            .insert(domain_data, returning=ReturnMethod.minimal)\
             .execute()
+        self._invalidate('active_disposable_domains')
+        self._invalidate_summaries()
 
     # =========================================================================
     # ANALYTICS & REPORTS
     # =========================================================================
 
     def get_vendor_summary(self, vendor_id: str = None) -> List[Dict[str, Any]]:
-        """Get vendor fraud summary (from view)."""
-        query = self.client.table('vendor_fraud_summary').select('*')
+        """Get vendor fraud summary (from view, cached for SUMMARY_CACHE_TTL seconds)."""
+        def fetch():
+            query = self.client.table('vendor_fraud_summary').select('*')
 
-        if vendor_id:
-            query = query.eq('id', vendor_id)
+            if vendor_id:
+                query = query.eq('id', vendor_id)
 
-        result = query.order('average_fraud_rate', desc=True).execute()
-        return result.data
+            return query.order('average_fraud_rate', desc=True).execute().data
+
+        return self._cached(('vendor_summary', vendor_id), fetch, SUMMARY_CACHE_TTL)
+
+    def get_top_fraud_vendors(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the vendors with the highest average fraud rate (ranked and
+        limited server-side, cached for SUMMARY_CACHE_TTL seconds).
+
+        Returns:
+            List of dicts with vendor_name and average_fraud_rate, highest first
+        """
+        def fetch():
+            return self.client.table('vendors')\
+                .select('vendor_name, average_fraud_rate')\
+                .not_.is_('average_fraud_rate', 'null')\
+                .order('average_fraud_rate', desc=True)\
+                .order('vendor_name')\
+                .limit(limit)\
+                .execute().data
+
+        return self._cached(('top_fraud_vendors', limit), fetch, SUMMARY_CACHE_TTL)
+
+    def get_vendor_status_counts(self) -> List[Dict[str, Any]]:
+        """
+        Get the number of vendors per status (grouped server-side, cached for
+        SUMMARY_CACHE_TTL seconds).
+
+        Returns:
+            List of dicts with vendor_status and vendor_count, most common first
+        """
+        return self._cached(('vendor_status_counts',), self._fetch_vendor_status_counts, SUMMARY_CACHE_TTL)
+
+    def _fetch_vendor_status_counts(self) -> List[Dict[str, Any]]:
+        """Uncached get_vendor_status_counts."""
+        try:
+            return self.client.rpc('vendor_status_counts', {}).execute().data
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # Function not deployed yet: count client-side
+            counts = Counter(row['vendor_status'] for row in self._iter_rows('vendors', 'id, vendor_status'))
+            return [
+                {'vendor_status': status, 'vendor_count': count}
+                for status, count in counts.most_common()
+            ]
+
+    def get_vendor_stats(self, vendor_id: str,
+                         batches: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Get fraud and refund statistics over all of a vendor's batches.
+
+        Args:
+            vendor_id: Vendor UUID
+            batches: The vendor's batch history (newest first, with at least
+                fraud_percentage, refund_status and refund_amount) when the
+                caller already has it - the statistics are then computed from
+                it without another request
+
+        Returns:
+            Dict with batch_count, avg/max/min/std_fraud_percentage,
+            full_refunds, partial_refunds, no_refunds, total_refund_amount and
+            recent3_avg_fraud_percentage (three latest batches); statistics
+            with no data are None
+        """
+        if batches is not None:
+            return self._compute_vendor_stats(batches)
+
+        try:
+            rows = self.client.rpc('vendor_fraud_stats', {'p_vendor': vendor_id}).execute().data
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # Function not deployed yet
+            return self._compute_vendor_stats(
+                self.get_vendor_fraud_history(vendor_id, 'fraud_percentage, refund_status, refund_amount')
+            )
+
+        if not rows:
+            # No row back: the same empty statistics as a vendor without batches
+            return self._compute_vendor_stats([])
+        stats = rows[0]
+
+        stats['total_refund_amount'] = float(stats['total_refund_amount'])
+        return stats
+
+    def _compute_vendor_stats(self, batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """get_vendor_stats computed client-side from a batch history."""
+        if NUMBA_AVAILABLE and len(batches) > STATS_JIT_MIN_BATCHES:
+            return self._compute_vendor_stats_jit(batches)
+
+        # Only fraud_percentage needs vectorized statistics: read it straight
+        # into one array (missing -> NaN) instead of a DataFrame of every column
+        fraud_percentage = np.fromiter(
+            (np.nan if batch['fraud_percentage'] is None else batch['fraud_percentage'] for batch in batches),
+            dtype=np.float64,
+            count=len(batches)
+        )
+        scored = fraud_percentage[~np.isnan(fraud_percentage)]
+        # History comes newest first, so the first three are the latest batches
+        recent = fraud_percentage[:3][~np.isnan(fraud_percentage[:3])]
+        # Slots 0-2 follow REFUND_CODES; other statuses (-1) land in the last slot
+        refunds = [0, 0, 0, 0]
+        for batch in batches:
+            refunds[REFUND_CODES.get(batch['refund_status'], -1)] += 1
+
+        return {
+            'batch_count': len(batches),
+            'avg_fraud_percentage': float(scored.mean()) if scored.size else None,
+            'max_fraud_percentage': float(scored.max()) if scored.size else None,
+            'min_fraud_percentage': float(scored.min()) if scored.size else None,
+            'std_fraud_percentage': float(scored.std(ddof=1)) if scored.size > 1 else None,
+            'full_refunds': refunds[0],
+            'partial_refunds': refunds[1],
+            'no_refunds': refunds[2],
+            'total_refund_amount': float(sum(batch['refund_amount'] or 0.0 for batch in batches)),
+            'recent3_avg_fraud_percentage': float(recent.mean()) if recent.size else None
+        }
+
+    def _compute_vendor_stats_jit(self, batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """_compute_vendor_stats for large vendors, via the compiled _batch_stats_kernel."""
+        count = len(batches)
+        fraud_percentage = np.empty(count, dtype=np.float64)
+        refund_code = np.empty(count, dtype=np.int8)
+        refund_amount = np.empty(count, dtype=np.float64)
+
+        # One Python pass fills all three arrays; the kernel does the rest
+        for i, batch in enumerate(batches):
+            fraud_percentage[i] = np.nan if batch['fraud_percentage'] is None else batch['fraud_percentage']
+            refund_code[i] = REFUND_CODES.get(batch['refund_status'], -1)
+            refund_amount[i] = np.nan if batch['refund_amount'] is None else batch['refund_amount']
+
+        mean, high, low, std, full, partial, none, refunded, recent = _batch_stats_kernel(
+            fraud_percentage, refund_code, refund_amount
+        )
+
+        def scalar(value):
+            return None if np.isnan(value) else float(value)
+
+        return {
+            'batch_count': count,
+            'avg_fraud_percentage': scalar(mean),
+            'max_fraud_percentage': scalar(high),
+            'min_fraud_percentage': scalar(low),
+            'std_fraud_percentage': scalar(std),
+            'full_refunds': int(full),
+            'partial_refunds': int(partial),
+            'no_refunds': int(none),
+            'total_refund_amount': float(refunded),
+            'recent3_avg_fraud_percentage': scalar(recent)
+        }
 
     def get_fraud_trends(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Get fraud trend data for the last N days."""
-        from datetime import timedelta
+        """
+        Get daily fraud trend rows for the last N days, oldest first.
 
-        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+        Read from the fraud_trends_daily materialized view (refreshed nightly),
+        one row per UTC day: day, batch_count, avg_fraud_percentage,
+        high_fraud_batches (>= 25%), full_refunds, partial_refunds, no_refunds.
+        """
+        cutoff_day = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
 
+        try:
+            result = self.client.table('fraud_trends_daily')\
+                .select('*')\
+                .gte('day', cutoff_day)\
+                .order('day')\
+                .execute()
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_RELATION_CODES:
+                raise
+            # View not deployed yet
+            return self._roll_up_trends(cutoff_day)
+
+        return result.data
+
+    def _roll_up_trends(self, cutoff_day: str) -> List[Dict[str, Any]]:
+        """Client-side fallback for get_fraud_trends (same rows as the view)."""
         result = self.client.table('batches')\
             .select('batch_date, fraud_percentage, refund_status')\
-            .gte('batch_date', cutoff_date)\
-            .order('batch_date', desc=False)\
+            .gte('batch_date', cutoff_day)\
             .execute()
 
-        return result.data
+        df = pd.DataFrame(result.data, columns=['batch_date', 'fraud_percentage', 'refund_status'])
+        fraud_percentage = df['fraud_percentage'].astype(float)
+        refund_status = df['refund_status']
+
+        # batch_date comes back as UTC ISO text, so its date part is the UTC day
+        trends = pd.DataFrame({
+            'day': df['batch_date'].str[:10],
+            'batch_count': 1,
+            'avg_fraud_percentage': fraud_percentage,
+            'high_fraud_batches': fraud_percentage >= 25,
+            'full_refunds': refund_status == 'FULL REFUND',
+            'partial_refunds': refund_status == 'PARTIAL REFUND',
+            'no_refunds': refund_status == 'NO REFUND'
+        }).groupby('day').agg({
+            'batch_count': 'sum',
+            'avg_fraud_percentage': 'mean',
+            'high_fraud_batches': 'sum',
+            'full_refunds': 'sum',
+            'partial_refunds': 'sum',
+            'no_refunds': 'sum'
+        }).reset_index()
+
+        return trends.astype(object).where(trends.notna(), None).to_dict('records')
 
     def get_refund_summary(self) -> Dict[str, Any]:
-        """Get summary of all refunds."""
+        """Get summary of all refunds (from view, cached for SUMMARY_CACHE_TTL seconds)."""
+        return self._cached(('refund_summary',), self._fetch_refund_summary, SUMMARY_CACHE_TTL)
+
+    def _fetch_refund_summary(self) -> Dict[str, Any]:
+        """Uncached get_refund_summary."""
+        try:
+            summary = self.client.table('refund_summary').select('*').execute().data[0]
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_RELATION_CODES:
+                raise
+            # View not deployed yet
+            return self._sum_refunds()
+
+        summary['total_refund_amount'] = float(summary['total_refund_amount'])
+        return summary
+
+    def _sum_refunds(self) -> Dict[str, Any]:
+        """Client-side fallback for get_refund_summary."""
         result = self.client.table('batches').select('refund_status, refund_amount').execute()
 
-        summary = {
-            'total_batches': len(result.data),
-            'full_refunds': 0,
-            'partial_refunds': 0,
-            'no_refunds': 0,
-            'total_refund_amount': 0.0
-        }
+        df = pd.DataFrame(result.data, columns=['refund_status', 'refund_amount'])
+        statuses = df['refund_status'].value_counts()
 
-        for batch in result.data:
-            status = batch.get('refund_status')
-            amount = batch.get('refund_amount', 0.0) or 0.0
+        return {
+            'total_batches': len(df),
+            'full_refunds': int(statuses.get('FULL REFUND', 0)),
+            'partial_refunds': int(statuses.get('PARTIAL REFUND', 0)),
+            'no_refunds': int(statuses.get('NO REFUND', 0)),
+            'total_refund_amount': float(df['refund_amount'].astype(float).fillna(0.0).sum())
+        }
 
-            if status == 'FULL REFUND':
-                summary['full_refunds'] += 1
-            elif status == 'PARTIAL REFUND':
-                summary['partial_refunds'] += 1
-            elif status == 'NO REFUND':
-                summary['no_refunds'] += 1
+    def get_overall_summary(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Get everything the overall summary report shows in one round trip
+        (cached for SUMMARY_CACHE_TTL seconds).
 
-            summary['total_refund_amount'] += amount
+        Returns:
+            Dict with 'stats' (get_database_stats: a count for every
+            STATS_TABLES table), 'refunds' (get_refund_summary), 'top_vendors'
+            (get_top_fraud_vendors(10)), 'vendor_status_counts'
+            (get_vendor_status_counts) and 'trends' (get_fraud_trends(days))
+        """
+        return self._cached(('overall_summary', days), lambda: self._fetch_overall_summary(days),
+                            SUMMARY_CACHE_TTL)
 
+    def _fetch_overall_summary(self, days: int) -> Dict[str, Any]:
+        """Uncached get_overall_summary."""
+        try:
+            summary = self.client.rpc('overall_summary', {'p_days': days}).execute().data
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # Function not deployed yet: one request per section, sent in parallel
+            # (the sections are independent, so this waits on the slowest, not the sum)
+            sections = {
+                'stats': self.get_database_stats,
+                'refunds': self.get_refund_summary,
+                'top_vendors': lambda: self.get_top_fraud_vendors(10),
+                'vendor_status_counts': self.get_vendor_status_counts,
+                'trends': lambda: self.get_fraud_trends(days)
+            }
+            with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+                futures = {name: executor.submit(fetch) for name, fetch in sections.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+        summary['refunds']['total_refund_amount'] = float(summary['refunds']['total_refund_amount'])
         return summary
 
     # =========================================================================
@@ -515,20 +1376,189 @@ class AnthonyLeadForensicsDB:
             return False
 
     def get_database_stats(self) -> Dict[str, int]:
-        """Get record counts for all tables."""
-        stats = {}
-
-        tables = ['vendors', 'batches', 'leads', 'fraud_blacklist',
-                  'disposable_email_domains', 'api_validation_log']
+        """
+        Get record counts for all tables (planner estimates for
+        PLANNED_COUNT_TABLES, exact otherwise), fetched in parallel and cached
+        for SUMMARY_CACHE_TTL seconds.
+        """
+        return self._cached(('database_stats',), self._count_tables, SUMMARY_CACHE_TTL)
 
-        for table in tables:
+    def _count_tables(self) -> Dict[str, int]:
+        """Uncached get_database_stats."""
+        def count(table):
             try:
-                result = self.client.table(table).select('id', count='exact').execute()
-                stats[table] = result.count
-            except:
-                stats[table] = 0
+                # HEAD request: only the count comes back, no rows
+                method = 'planned' if table in PLANNED_COUNT_TABLES else 'exact'
+                result = self.client.table(table).select('*', count=method, head=True).execute()
+                return result.count or 0
+            except Exception:
+                return 0
 
-        return stats
+        # Counts share the pooled HTTP client; the refresh waits on the slowest, not the sum
+        with ThreadPoolExecutor(max_workers=len(STATS_TABLES)) as executor:
+            counts = list(executor.map(count, STATS_TABLES))
+        return dict(zip(STATS_TABLES, counts))
+
+
+class AsyncAnthonyLeadForensicsDB:
+    """
+    Async client for the batch write path, sending independent requests concurrently.
+
+    Create with ``await AsyncAnthonyLeadForensicsDB.create()`` and close with
+    ``aclose()`` (or use ``async with``); one HTTP connection pool is reused
+    for the client's lifetime.
+    """
+
+    def __init__(self, client, concurrency: int = 8):
+        """
+        Wrap an already created supabase AsyncClient.
+
+        Args:
+            client: supabase AsyncClient
+            concurrency: Insert requests in flight at once
+        """
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    @classmethod
+    async def create(cls, url: str = None, key: str = None,
+                     concurrency: int = 8) -> 'AsyncAnthonyLeadForensicsDB':
+        """
+        Connect an async client (credentials as for AnthonyLeadForensicsDB).
+
+        Args:
+            url: Supabase project URL (or load from env)
+            key: Supabase anon/service key (or load from env)
+            concurrency: Insert requests in flight at once
+        """
+        if acreate_client is None:
+            raise RuntimeError("supabase async client not available. Run: pip install -U supabase")
+
+        url, key = _load_credentials(url, key)
+        http = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(http2=True, retries=2, limits=HTTP_LIMITS),
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True
+        )
+        client = await acreate_client(url, key, AsyncClientOptions(httpx_client=http))
+        return cls(client, concurrency)
+
+    async def aclose(self):
+        """Close the HTTP connection pool."""
+        await self.client.options.httpx_client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _insert(self, table: str, rows: List[Dict[str, Any]],
+                      returning: ReturnMethod = ReturnMethod.representation) -> List[Dict[str, Any]]:
+        """Insert rows, encoding the payload with orjson when it is installed."""
+        if orjson is None:
+            return (await self.client.table(table).insert(rows, returning=returning).execute()).data
+
+        url, content, headers = _insert_request(self.client.postgrest, table, rows, returning)
+        http = self.client.options.httpx_client
+        return _rest_response(await http.post(url, content=content, headers=headers))
+
+    async def get_or_create_vendor(self, vendor_name: str, **kwargs) -> Dict[str, Any]:
+        """Get vendor by name, or create if doesn't exist."""
+        select = self.client.table('vendors').select('*').eq('vendor_name', vendor_name)
+        result = await select.execute()
+
+        if result.data:
+            return result.data[0]
+
+        result = await self.client.table('vendors')\
+            .upsert(_new_vendor(vendor_name, **kwargs), on_conflict='vendor_name', ignore_duplicates=True)\
+            .execute()
+        return result.data[0] if result.data else (await select.execute()).data[0]
+
+    async def create_batch(self, batch_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new batch record."""
+        result = await self.client.table('batches').insert(_set_batch_defaults(batch_data)).execute()
+        return result.data[0]
+
+    async def create_leads(self, leads_data: List[Dict[str, Any]], chunk_size: int = 1000,
+                           progress=None, return_rows: bool = True) -> List[Dict[str, Any]]:
+        """
+        Bulk insert leads, with up to `concurrency` chunk inserts in flight.
+
+        Args:
+            leads_data: List of lead dicts with fraud scores and details
+            chunk_size: Leads per insert request
+            progress: Optional wrapper for the completed-chunk iterator, called
+                as progress(iterable, total) - e.g. to show a tqdm bar
+            return_rows: Send the created records back (False skips that response body)
+
+        Returns:
+            List of created lead records (in completion order; empty if not return_rows)
+        """
+        returning = ReturnMethod.representation if return_rows else ReturnMethod.minimal
+
+        async def insert_chunk(chunk):
+            async with self.semaphore:
+                return await self._insert('leads', chunk, returning)
+
+        chunks = [
+            insert_chunk(leads_data[i:i + chunk_size])
+            for i in range(0, len(leads_data), chunk_size)
+        ]
+        completed = asyncio.as_completed(chunks)
+        if progress:
+            completed = progress(completed, len(chunks))
+
+        all_results = []
+        for inserted in completed:
+            all_results.extend(await inserted)
+        return all_results
+
+    async def create_fraud_indicators(self, batch_id: str, indicators: List[Dict[str, Any]]):
+        """Save top fraud indicators for a batch."""
+        for indicator in indicators:
+            indicator['batch_id'] = batch_id
+
+        await self._insert('batch_fraud_indicators', indicators, ReturnMethod.minimal)
+
+    async def search_leads_by_emails(self, emails: List[str]) -> List[Dict[str, Any]]:
+        """Search for leads matching any of the emails, with up to `concurrency` chunk queries in flight."""
+        return await self._search_leads('lead_email', emails)
+
+    async def search_leads_by_phones(self, phones: List[str]) -> List[Dict[str, Any]]:
+        """Search for leads matching any of the phones, with up to `concurrency` chunk queries in flight."""
+        return await self._search_leads('lead_phone', phones)
+
+    async def _search_leads(self, column: str, values: List[str]) -> List[Dict[str, Any]]:
+        """Fetch leads whose column is in values, SEARCH_CHUNK values per request."""
+        values = list(dict.fromkeys(v for v in values if v))
+
+        async def search(chunk):
+            async with self.semaphore:
+                result = await self.client.table('leads')\
+                    .select('*, batches(batch_identifier, vendor_id)')\
+                    .in_(column, chunk)\
+                    .execute()
+                return result.data
+
+        found = await asyncio.gather(*(
+            search(values[i:i + SEARCH_CHUNK]) for i in range(0, len(values), SEARCH_CHUNK)
+        ))
+        return [lead for leads in found for lead in leads]
+
+    async def get_database_stats(self) -> Dict[str, int]:
+        """Get record counts for all tables (counted as by the sync client), requesting every count at once."""
+        async def count(table):
+            try:
+                method = 'planned' if table in PLANNED_COUNT_TABLES else 'exact'
+                result = await self.client.table(table).select('*', count=method, head=True).execute()
+                return result.count or 0
+            except Exception:
+                return 0
+
+        counts = await asyncio.gather(*(count(table) for table in STATS_TABLES))
+        return dict(zip(STATS_TABLES, counts))
 
 
 # =============================================================================
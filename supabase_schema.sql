@@ -9,7 +9,7 @@ CREATE TABLE IF NOT EXISTS vendors (
     vendor_name TEXT NOT NULL UNIQUE,
     vendor_email TEXT,
     vendor_phone TEXT,
-    first_batch_date TIMESTAMP WITH TIME ZONE,
+    first_batch_date TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     last_batch_date TIMESTAMP WITH TIME ZONE,
     total_batches INTEGER DEFAULT 0,
     total_leads_received INTEGER DEFAULT 0,
@@ -22,6 +22,9 @@ CREATE TABLE IF NOT EXISTS vendors (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Databases created before first_batch_date had a default
+ALTER TABLE vendors ALTER COLUMN first_batch_date SET DEFAULT NOW();
+
 -- Index for fast vendor lookups
 CREATE INDEX IF NOT EXISTS idx_vendors_name ON vendors(vendor_name);
 CREATE INDEX IF NOT EXISTS idx_vendors_status ON vendors(vendor_status);
@@ -142,11 +145,17 @@ CREATE TABLE IF NOT EXISTS leads (
 );
 
 -- Indexes for fast lead lookups
-CREATE INDEX IF NOT EXISTS idx_leads_batch ON leads(batch_id);
 CREATE INDEX IF NOT EXISTS idx_leads_classification ON leads(classification);
 CREATE INDEX IF NOT EXISTS idx_leads_fraud_score ON leads(fraud_score);
 CREATE INDEX IF NOT EXISTS idx_leads_email ON leads(lead_email);
 CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads(lead_phone);
+-- A batch's leads in id order (batch_id lookups and iter_leads_by_batch pages),
+-- and a small partial index holding only fraudulent leads. On a live database
+-- with many leads, build these with CREATE INDEX CONCURRENTLY instead to avoid
+-- blocking inserts. idx_leads_batch (batch_id alone) is covered by the first.
+CREATE INDEX IF NOT EXISTS idx_leads_batch_id ON leads(batch_id, id);
+DROP INDEX IF EXISTS idx_leads_batch;
+CREATE INDEX IF NOT EXISTS idx_leads_fraud_by_batch ON leads(batch_id, id) WHERE is_fraudulent;
 
 -- =============================================================================
 -- FRAUD PATTERNS TABLE
@@ -194,6 +203,8 @@ CREATE TABLE IF NOT EXISTS batch_fraud_indicators (
 );
 
 CREATE INDEX IF NOT EXISTS idx_indicators_batch ON batch_fraud_indicators(batch_id);
+-- get_fraud_indicators: a batch's indicators already in affected_lead_count order
+CREATE INDEX IF NOT EXISTS idx_indicators_batch_count ON batch_fraud_indicators(batch_id, affected_lead_count DESC);
 
 -- =============================================================================
 -- API VALIDATION LOG TABLE
@@ -327,6 +338,45 @@ FROM batch_fraud_indicators
 GROUP BY indicator_name, indicator_category
 ORDER BY times_detected DESC;
 
+-- Refund totals view (one row)
+CREATE OR REPLACE VIEW refund_summary AS
+SELECT
+    COUNT(*) as total_batches,
+    COUNT(*) FILTER (WHERE refund_status = 'FULL REFUND') as full_refunds,
+    COUNT(*) FILTER (WHERE refund_status = 'PARTIAL REFUND') as partial_refunds,
+    COUNT(*) FILTER (WHERE refund_status = 'NO REFUND') as no_refunds,
+    COALESCE(SUM(refund_amount), 0) as total_refund_amount
+FROM batches;
+
+-- Daily fraud trend rollup, read by get_fraud_trends. Materialized so
+-- dashboard reads cost O(days) instead of scanning batches on every call
+CREATE MATERIALIZED VIEW IF NOT EXISTS fraud_trends_daily AS
+SELECT
+    (batch_date AT TIME ZONE 'UTC')::date as day,
+    COUNT(*) as batch_count,
+    AVG(fraud_percentage) as avg_fraud_percentage,
+    COUNT(*) FILTER (WHERE fraud_percentage >= 25) as high_fraud_batches,
+    COUNT(*) FILTER (WHERE refund_status = 'FULL REFUND') as full_refunds,
+    COUNT(*) FILTER (WHERE refund_status = 'PARTIAL REFUND') as partial_refunds,
+    COUNT(*) FILTER (WHERE refund_status = 'NO REFUND') as no_refunds
+FROM batches
+GROUP BY 1;
+
+-- REFRESH ... CONCURRENTLY needs a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fraud_trends_daily_day ON fraud_trends_daily(day);
+
+-- Refresh nightly (after midnight UTC) when pg_cron is enabled
+-- (Database > Extensions); without it, run the REFRESH from any scheduler
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'refresh-fraud-trends-daily', '5 0 * * *',
+            'REFRESH MATERIALIZED VIEW CONCURRENTLY fraud_trends_daily'
+        );
+    END IF;
+END $$;
+
 -- =============================================================================
 -- FUNCTIONS
 -- =============================================================================
@@ -381,6 +431,192 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to record disposable-domain detections: adds p_hits[i] to the
+-- times_detected of p_domains[i] in a single atomic UPDATE
+CREATE OR REPLACE FUNCTION touch_disposable(p_domains TEXT[], p_hits INTEGER[])
+RETURNS VOID AS $$
+    UPDATE disposable_email_domains d
+    SET times_detected = COALESCE(d.times_detected, 0) + h.hits,
+        last_detected = NOW()
+    FROM unnest(p_domains, p_hits) AS h(domain, hits)
+    WHERE d.domain = h.domain;
+$$ LANGUAGE sql;
+
+-- Function to total API validation costs per service, for one batch or overall
+CREATE OR REPLACE FUNCTION api_cost_summary(p_batch UUID DEFAULT NULL)
+RETURNS TABLE(api_service TEXT, total_cost NUMERIC) AS $$
+    SELECT l.api_service, COALESCE(SUM(l.api_cost), 0)
+    FROM api_validation_log l
+    LEFT JOIN leads ld ON ld.id = l.lead_id
+    WHERE p_batch IS NULL OR ld.batch_id = p_batch
+    GROUP BY l.api_service;
+$$ LANGUAGE sql STABLE;
+
+-- Function to save an analyzed batch (vendor, batch, leads, indicators) in a
+-- single transaction, returning the vendor and batch ids
+CREATE OR REPLACE FUNCTION save_fraud_batch(
+    p_vendor_name TEXT,
+    p_batch JSONB,
+    p_leads JSONB,
+    p_indicators JSONB
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_vendor_id UUID;
+    v_batch_id UUID;
+BEGIN
+    INSERT INTO vendors (vendor_name, first_batch_date, vendor_status)
+    VALUES (p_vendor_name, NOW(), 'active')
+    ON CONFLICT (vendor_name) DO NOTHING;
+
+    SELECT id INTO v_vendor_id FROM vendors WHERE vendor_name = p_vendor_name;
+
+    INSERT INTO batches (
+        vendor_id, batch_identifier, batch_date, lead_count, fraudulent_count,
+        valid_count, fraud_percentage, refund_status, refund_percentage,
+        refund_amount, cost_per_lead, total_batch_cost, avg_fraud_score,
+        avg_contact_score, avg_duplicate_score, avg_quality_score, input_filename
+    )
+    SELECT
+        v_vendor_id, b.batch_identifier, COALESCE(b.batch_date, NOW()), b.lead_count,
+        b.fraudulent_count, b.valid_count, b.fraud_percentage, b.refund_status,
+        b.refund_percentage, b.refund_amount, b.cost_per_lead, b.total_batch_cost,
+        b.avg_fraud_score, b.avg_contact_score, b.avg_duplicate_score,
+        b.avg_quality_score, b.input_filename
+    FROM jsonb_to_record(p_batch) AS b(
+        batch_identifier TEXT, batch_date TIMESTAMP WITH TIME ZONE, lead_count INTEGER,
+        fraudulent_count INTEGER, valid_count INTEGER, fraud_percentage DECIMAL,
+        refund_status TEXT, refund_percentage DECIMAL, refund_amount DECIMAL,
+        cost_per_lead DECIMAL, total_batch_cost DECIMAL, avg_fraud_score DECIMAL,
+        avg_contact_score DECIMAL, avg_duplicate_score DECIMAL,
+        avg_quality_score DECIMAL, input_filename TEXT
+    )
+    RETURNING id INTO v_batch_id;
+
+    INSERT INTO leads (
+        batch_id, lead_name, lead_email, lead_phone, lead_address, lead_city,
+        lead_state, lead_zip, fraud_score, classification, is_fraudulent,
+        contact_score, duplicate_score, quality_score, fraud_reasons
+    )
+    SELECT
+        v_batch_id, l.lead_name, l.lead_email, l.lead_phone, l.lead_address, l.lead_city,
+        l.lead_state, l.lead_zip, l.fraud_score, l.classification, l.is_fraudulent,
+        l.contact_score, l.duplicate_score, l.quality_score, l.fraud_reasons
+    FROM jsonb_to_recordset(p_leads) AS l(
+        lead_name TEXT, lead_email TEXT, lead_phone TEXT, lead_address TEXT,
+        lead_city TEXT, lead_state TEXT, lead_zip TEXT, fraud_score INTEGER,
+        classification TEXT, is_fraudulent BOOLEAN, contact_score INTEGER,
+        duplicate_score INTEGER, quality_score INTEGER, fraud_reasons TEXT
+    );
+
+    INSERT INTO batch_fraud_indicators (
+        batch_id, indicator_name, indicator_category, affected_lead_count,
+        percentage, points_per_lead, total_points
+    )
+    SELECT
+        v_batch_id, i.indicator_name, i.indicator_category, i.affected_lead_count,
+        i.percentage, i.points_per_lead, i.total_points
+    FROM jsonb_to_recordset(p_indicators) AS i(
+        indicator_name TEXT, indicator_category TEXT, affected_lead_count INTEGER,
+        percentage DECIMAL, points_per_lead INTEGER, total_points INTEGER
+    );
+
+    RETURN jsonb_build_object('vendor_id', v_vendor_id, 'batch_id', v_batch_id);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function computing one vendor's batch fraud and refund statistics in one row
+-- (recent3_avg_fraud_percentage covers the three latest batches)
+CREATE OR REPLACE FUNCTION vendor_fraud_stats(p_vendor UUID)
+RETURNS TABLE(
+    batch_count BIGINT,
+    avg_fraud_percentage NUMERIC,
+    max_fraud_percentage NUMERIC,
+    min_fraud_percentage NUMERIC,
+    std_fraud_percentage NUMERIC,
+    full_refunds BIGINT,
+    partial_refunds BIGINT,
+    no_refunds BIGINT,
+    total_refund_amount NUMERIC,
+    recent3_avg_fraud_percentage NUMERIC
+) AS $$
+    SELECT
+        COUNT(*),
+        AVG(b.fraud_percentage),
+        MAX(b.fraud_percentage),
+        MIN(b.fraud_percentage),
+        STDDEV_SAMP(b.fraud_percentage),
+        COUNT(*) FILTER (WHERE b.refund_status = 'FULL REFUND'),
+        COUNT(*) FILTER (WHERE b.refund_status = 'PARTIAL REFUND'),
+        COUNT(*) FILTER (WHERE b.refund_status = 'NO REFUND'),
+        COALESCE(SUM(b.refund_amount), 0),
+        (SELECT AVG(r.fraud_percentage)
+         FROM (SELECT fraud_percentage FROM batches
+               WHERE vendor_id = p_vendor
+               ORDER BY batch_date DESC
+               LIMIT 3) r)
+    FROM batches b
+    WHERE b.vendor_id = p_vendor;
+$$ LANGUAGE sql STABLE;
+
+-- Function counting vendors per status, most common first
+CREATE OR REPLACE FUNCTION vendor_status_counts()
+RETURNS TABLE(vendor_status TEXT, vendor_count BIGINT) AS $$
+    SELECT v.vendor_status, COUNT(*)
+    FROM vendors v
+    GROUP BY v.vendor_status
+    ORDER BY COUNT(*) DESC, v.vendor_status;
+$$ LANGUAGE sql STABLE;
+
+-- Function returning everything the analyzer's overall summary shows (table
+-- counts, refund totals, top 10 vendors by fraud rate, vendor status counts,
+-- daily trends) in one round trip
+CREATE OR REPLACE FUNCTION overall_summary(p_days INTEGER DEFAULT 30)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'stats', jsonb_build_object(
+            'vendors', (SELECT COUNT(*) FROM vendors),
+            'batches', (SELECT COUNT(*) FROM batches),
+            'fraud_blacklist', (SELECT COUNT(*) FROM fraud_blacklist),
+            'disposable_email_domains', (SELECT COUNT(*) FROM disposable_email_domains),
+            -- leads and api_validation_log are large: planner estimates, as
+            -- get_database_stats counts them (PLANNED_COUNT_TABLES in supabase_client.py)
+            'leads', (
+                SELECT CASE WHEN c.reltuples >= 0 THEN c.reltuples::BIGINT
+                            ELSE (SELECT COUNT(*) FROM leads) END
+                FROM pg_class c
+                WHERE c.oid = 'leads'::regclass
+            ),
+            'api_validation_log', (
+                SELECT CASE WHEN c.reltuples >= 0 THEN c.reltuples::BIGINT
+                            ELSE (SELECT COUNT(*) FROM api_validation_log) END
+                FROM pg_class c
+                WHERE c.oid = 'api_validation_log'::regclass
+            )
+        ),
+        'refunds', (SELECT to_jsonb(r) FROM refund_summary r),
+        'top_vendors', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(t) ORDER BY t.average_fraud_rate DESC, t.vendor_name), '[]'::jsonb)
+            FROM (
+                SELECT vendor_name, average_fraud_rate
+                FROM vendors
+                WHERE average_fraud_rate IS NOT NULL
+                ORDER BY average_fraud_rate DESC, vendor_name
+                LIMIT 10
+            ) t
+        ),
+        'vendor_status_counts', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(c) ORDER BY c.vendor_count DESC, c.vendor_status), '[]'::jsonb)
+            FROM vendor_status_counts() c
+        ),
+        'trends', (
+            SELECT COALESCE(jsonb_agg(to_jsonb(t) ORDER BY t.day), '[]'::jsonb)
+            FROM fraud_trends_daily t
+            WHERE t.day >= (NOW() AT TIME ZONE 'UTC')::date - p_days
+        )
+    );
+$$ LANGUAGE sql STABLE;
+
 -- =============================================================================
 -- TRIGGERS
 -- =============================================================================
@@ -13,11 +13,16 @@ Usage:
 
 Requirements:
     pip install pandas supabase python-dotenv
+    pip install xlsxwriter  # optional, streams Excel exports in constant memory
 """
 
+import io
 import sys
 import argparse
+import functools
+import contextlib
 from datetime import datetime, timedelta
+import httpx
 import pandas as pd
 
 try:
@@ -26,6 +31,68 @@ except ImportError:
     print("ERROR: supabase_client.py not found")
     sys.exit(1)
 
+try:
+    import xlsxwriter
+except ImportError:
+    # xlsxwriter is optional - without it exports are written by pandas/openpyxl
+    xlsxwriter = None
+
+# Each run issues a handful of sequential queries: a small keep-alive pool
+# reuses one TLS connection for all of them and stays well under Supabase's
+# connection cap when several analyzers run at once
+HTTP_LIMITS = httpx.Limits(max_connections=5, max_keepalive_connections=5, keepalive_expiry=60)
+
+# The batch columns the reports print (the Excel export keeps whole rows)
+BATCH_COLUMNS = (
+    'batch_identifier, batch_date, lead_count, fraudulent_count, fraud_percentage, '
+    'refund_status, refund_amount, auto_refund_triggered, auto_refund_reason'
+)
+
+
+def format_rate(value, digits=2):
+    """Format a fraud percentage for the report, 'n/a' when there is none."""
+    return f"{value:.{digits}f}%" if value is not None else "n/a"
+
+
+def buffered_output(method):
+    """
+    Collect everything a report method prints and write it to stdout in one
+    call at the end (also on errors), instead of one write per print().
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer):
+                return method(*args, **kwargs)
+        finally:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+    return wrapper
+
+
+def write_excel_rows(output_file, sheets):
+    """
+    Write sheets row by row with xlsxwriter's constant_memory mode, which
+    flushes each finished row to disk, so memory stays flat however many
+    rows are exported.
+
+    Args:
+        output_file: .xlsx path
+        sheets: Dict of sheet name -> (column names, iterable of row values)
+    """
+    workbook = xlsxwriter.Workbook(output_file, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'border': 1})
+
+    for sheet_name, (columns, rows) in sheets.items():
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, columns, header_format)
+        for row_num, row in enumerate(rows, 1):
+            worksheet.write_row(row_num, 0, row)
+
+    workbook.close()
+
 
 class VendorHistoryAnalyzer:
     """
@@ -34,7 +101,7 @@ class VendorHistoryAnalyzer:
 
     def __init__(self):
         try:
-            self.db = AnthonyLeadForensicsDB()
+            self.db = AnthonyLeadForensicsDB(http_limits=HTTP_LIMITS)
             if not self.db.test_connection():
                 print("ERROR: Could not connect to Supabase database")
                 sys.exit(1)
@@ -42,6 +109,11 @@ class VendorHistoryAnalyzer:
             print(f"ERROR: Failed to initialize database: {e}")
             sys.exit(1)
 
+    def close(self):
+        """Release the database connection pool."""
+        self.db.close()
+
+    @buffered_output
     def list_vendors(self):
         """List all vendors with summary stats."""
         print("\n" + "=" * 80)
@@ -84,19 +156,21 @@ class VendorHistoryAnalyzer:
             for _, vendor in problem_vendors.iterrows():
                 print(f"  - {vendor['vendor_name']}: {vendor['average_fraud_rate']:.1f}%")
 
+    @buffered_output
     def analyze_vendor(self, vendor_name):
         """Detailed analysis of a specific vendor."""
         print("\n" + "=" * 80)
         print(f"VENDOR FRAUD HISTORY ANALYSIS: {vendor_name}")
         print("=" * 80)
 
-        # Get vendor
-        vendor = self.db.get_vendor_by_name(vendor_name)
+        # Get vendor and its batch history in one request
+        vendor = self.db.get_vendor_with_batches(vendor_name, BATCH_COLUMNS)
         if not vendor:
             print(f"ERROR: Vendor '{vendor_name}' not found in database.")
             return
 
         vendor_id = vendor['id']
+        batches = vendor.pop('batches')
 
         print(f"\nVendor Information:")
         print(f"  Name: {vendor['vendor_name']}")
@@ -107,9 +181,6 @@ class VendorHistoryAnalyzer:
         print(f"  Average Fraud Rate: {vendor['average_fraud_rate']:.2f}%")
         print(f"  Total Refunds: ${vendor['total_refunds_issued']:.2f}")
 
-        # Get batch history
-        batches = self.db.get_vendor_fraud_history(vendor_id)
-
         if not batches:
             print("\nNo batches found for this vendor.")
             return
@@ -118,47 +189,47 @@ class VendorHistoryAnalyzer:
         print(f"BATCH HISTORY ({len(batches)} batches)")
         print("-" * 80)
 
-        # Create DataFrame
-        df = pd.DataFrame(batches)
-
         # Display each batch
         for idx, batch in enumerate(batches, 1):
             print(f"\nBatch #{idx}: {batch['batch_identifier']}")
             print(f"  Date: {batch['batch_date']}")
             print(f"  Leads: {batch['lead_count']}")
-            print(f"  Fraudulent: {batch['fraudulent_count']} ({batch['fraud_percentage']:.1f}%)")
+            print(f"  Fraudulent: {batch['fraudulent_count']} ({format_rate(batch['fraud_percentage'], 1)})")
             print(f"  Refund Status: {batch['refund_status']}")
             if batch['refund_amount']:
                 print(f"  Refund Amount: ${batch['refund_amount']:.2f}")
             if batch['auto_refund_triggered']:
                 print(f"  ⚠️  AUTO-REFUND TRIGGERED: {batch['auto_refund_reason']}")
 
-        # Statistics
+        # Statistics from the history already fetched (no second round trip)
+        stats = self.db.get_vendor_stats(vendor_id, batches)
+        batch_count = stats['batch_count']
+
         print(f"\n" + "-" * 80)
         print("FRAUD STATISTICS")
         print("-" * 80)
 
-        avg_fraud = df['fraud_percentage'].mean()
-        max_fraud = df['fraud_percentage'].max()
-        min_fraud = df['fraud_percentage'].min()
-        std_fraud = df['fraud_percentage'].std()
+        avg_fraud = stats['avg_fraud_percentage']
+        std_fraud = stats['std_fraud_percentage']
 
-        print(f"  Average Fraud Rate: {avg_fraud:.2f}%")
-        print(f"  Maximum Fraud Rate: {max_fraud:.2f}%")
-        print(f"  Minimum Fraud Rate: {min_fraud:.2f}%")
-        print(f"  Standard Deviation: {std_fraud:.2f}%")
+        # Rates are None when no batch has a fraud percentage, and the sample
+        # standard deviation is undefined for a single batch
+        print(f"  Average Fraud Rate: {format_rate(avg_fraud)}")
+        print(f"  Maximum Fraud Rate: {format_rate(stats['max_fraud_percentage'])}")
+        print(f"  Minimum Fraud Rate: {format_rate(stats['min_fraud_percentage'])}")
+        print(f"  Standard Deviation: {format_rate(std_fraud)}")
 
         # Refund statistics
-        full_refunds = len(df[df['refund_status'] == 'FULL REFUND'])
-        partial_refunds = len(df[df['refund_status'] == 'PARTIAL REFUND'])
-        no_refunds = len(df[df['refund_status'] == 'NO REFUND'])
+        full_refunds = stats['full_refunds']
+        partial_refunds = stats['partial_refunds']
+        no_refunds = stats['no_refunds']
 
         print(f"\n  Refund Breakdown:")
-        print(f"    Full Refunds: {full_refunds} ({full_refunds/len(df)*100:.1f}%)")
-        print(f"    Partial Refunds: {partial_refunds} ({partial_refunds/len(df)*100:.1f}%)")
-        print(f"    No Refunds: {no_refunds} ({no_refunds/len(df)*100:.1f}%)")
+        print(f"    Full Refunds: {full_refunds} ({full_refunds/batch_count*100:.1f}%)")
+        print(f"    Partial Refunds: {partial_refunds} ({partial_refunds/batch_count*100:.1f}%)")
+        print(f"    No Refunds: {no_refunds} ({no_refunds/batch_count*100:.1f}%)")
 
-        total_refunded = df['refund_amount'].sum()
+        total_refunded = stats['total_refund_amount']
         print(f"\n  Total Amount Refunded: ${total_refunded:.2f}")
 
         # Trend analysis
@@ -166,9 +237,10 @@ class VendorHistoryAnalyzer:
         print("TREND ANALYSIS")
         print("-" * 80)
 
-        if len(df) >= 3:
-            recent_3 = df.head(3)['fraud_percentage'].mean()
-            overall = df['fraud_percentage'].mean()
+        recent_3 = stats['recent3_avg_fraud_percentage']
+        overall = avg_fraud
+
+        if batch_count >= 3 and recent_3 is not None and overall is not None:
 
             print(f"  Last 3 batches avg: {recent_3:.2f}%")
             print(f"  Overall average: {overall:.2f}%")
@@ -180,14 +252,16 @@ class VendorHistoryAnalyzer:
             else:
                 print(f"  → TREND: Stable")
         else:
-            print("  Not enough data for trend analysis (need 3+ batches)")
+            print("  Not enough data for trend analysis (need 3+ batches with fraud rates)")
 
         # Recommendation
         print(f"\n" + "-" * 80)
         print("RECOMMENDATION")
         print("-" * 80)
 
-        if avg_fraud >= 40:
+        if avg_fraud is None:
+            print("  ? NO FRAUD DATA - No batch has a fraud rate yet")
+        elif avg_fraud >= 40:
             print("  🚫 BLACKLIST VENDOR - Consistently high fraud rate (≥40%)")
         elif avg_fraud >= 30:
             print("  ⛔ SUSPEND VENDOR - High fraud rate (≥30%)")
@@ -198,13 +272,14 @@ class VendorHistoryAnalyzer:
         else:
             print("  ✓ ACCEPTABLE - Within normal fraud tolerance")
 
+    @buffered_output
     def high_fraud_report(self, threshold=25.0, days=30):
         """Report on high fraud batches."""
         print("\n" + "=" * 80)
         print(f"HIGH FRAUD BATCHES (≥{threshold}% fraud)")
         print("=" * 80)
 
-        batches = self.db.get_high_fraud_batches(threshold=threshold)
+        batches = self.db.get_high_fraud_batches(threshold=threshold, columns=BATCH_COLUMNS)
 
         if not batches:
             print(f"\nNo batches found with fraud rate ≥{threshold}%")
@@ -225,14 +300,18 @@ class VendorHistoryAnalyzer:
                 print(f"   Auto-Refund: {batch['auto_refund_reason']}")
             print()
 
+    @buffered_output
     def overall_summary(self):
         """Overall fraud detection summary."""
         print("\n" + "=" * 80)
         print("FRAUD DETECTION SYSTEM - OVERALL SUMMARY")
         print("=" * 80)
 
+        # Stats, refunds, vendors and trends arrive in a single request
+        summary = self.db.get_overall_summary(days=30)
+
         # Database stats
-        stats = self.db.get_database_stats()
+        stats = summary['stats']
 
         print(f"\nDatabase Statistics:")
         print(f"  Vendors: {stats.get('vendors', 0)}")
@@ -241,7 +320,7 @@ class VendorHistoryAnalyzer:
         print(f"  Blacklist Entries: {stats.get('fraud_blacklist', 0)}")
 
         # Refund summary
-        refund_summary = self.db.get_refund_summary()
+        refund_summary = summary['refunds']
 
         print(f"\nRefund Summary:")
         print(f"  Total Batches Analyzed: {refund_summary['total_batches']}")
@@ -250,53 +329,48 @@ class VendorHistoryAnalyzer:
         print(f"  No Refunds: {refund_summary['no_refunds']}")
         print(f"  Total Refunded: ${refund_summary['total_refund_amount']:.2f}")
 
-        # Vendor summary
-        vendors = self.db.get_vendor_summary()
-
-        if vendors:
-            df = pd.DataFrame(vendors)
+        # Vendor summary (grouped and ranked server-side)
+        status_counts = summary['vendor_status_counts']
 
+        if status_counts:
             print(f"\nVendor Status Distribution:")
-            if 'vendor_status' in df.columns:
-                status_counts = df['vendor_status'].value_counts()
-                for status, count in status_counts.items():
-                    print(f"  {status.title()}: {count}")
+            for row in status_counts:
+                if row['vendor_status'] is not None:
+                    print(f"  {row['vendor_status'].title()}: {row['vendor_count']}")
 
             print(f"\nTop 10 Highest Fraud Rate Vendors:")
-            if 'average_fraud_rate' in df.columns and 'vendor_name' in df.columns:
-                top_fraud = df.nlargest(10, 'average_fraud_rate')
-                for idx, vendor in enumerate(top_fraud.itertuples(), 1):
-                    print(f"  {idx}. {vendor.vendor_name}: {vendor.average_fraud_rate:.1f}%")
+            for idx, vendor in enumerate(summary['top_vendors'], 1):
+                print(f"  {idx}. {vendor['vendor_name']}: {vendor['average_fraud_rate']:.1f}%")
 
         # Recent trends
         print(f"\nRecent Activity (Last 30 days):")
-        trends = self.db.get_fraud_trends(days=30)
+        trends = summary['trends']
 
         if trends:
+            # One row per day: weight each day's average by its batch count
             df_trends = pd.DataFrame(trends)
-            avg_recent = df_trends['fraud_percentage'].mean()
-            print(f"  Batches Analyzed: {len(df_trends)}")
+            batch_count = df_trends['batch_count'].sum()
+            avg_recent = (df_trends['avg_fraud_percentage'] * df_trends['batch_count']).sum() / batch_count
+            print(f"  Batches Analyzed: {batch_count}")
             print(f"  Average Fraud Rate: {avg_recent:.2f}%")
 
-            high_fraud = len(df_trends[df_trends['fraud_percentage'] >= 25.0])
+            high_fraud = df_trends['high_fraud_batches'].sum()
             if high_fraud > 0:
                 print(f"  ⚠️  High Fraud Batches (≥25%): {high_fraud}")
 
+    @buffered_output
     def export_vendor_report(self, vendor_name, output_file=None):
         """Export vendor analysis to Excel."""
-        vendor = self.db.get_vendor_by_name(vendor_name)
+        vendor = self.db.get_vendor_with_batches(vendor_name)
         if not vendor:
             print(f"ERROR: Vendor '{vendor_name}' not found")
             return
 
-        batches = self.db.get_vendor_fraud_history(vendor['id'])
+        batches = vendor.pop('batches')
         if not batches:
             print("No batch data to export")
             return
 
-        # Create DataFrame
-        df = pd.DataFrame(batches)
-
         # Prepare output file
         if not output_file:
             safe_name = vendor_name.replace(' ', '_').replace('/', '_')
@@ -304,32 +378,40 @@ class VendorHistoryAnalyzer:
 
         print(f"Exporting to: {output_file}")
 
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # Batch history
-            df.to_excel(writer, sheet_name='Batch History', index=False)
-
-            # Vendor summary
-            summary_data = {
-                'Metric': [
-                    'Vendor Name',
-                    'Status',
-                    'Total Batches',
-                    'Total Leads',
-                    'Fraudulent Leads',
-                    'Average Fraud Rate',
-                    'Total Refunds'
-                ],
-                'Value': [
-                    vendor['vendor_name'],
-                    vendor['vendor_status'],
-                    vendor['total_batches'],
-                    vendor['total_leads_received'],
-                    vendor['total_fraudulent_leads'],
-                    f"{vendor['average_fraud_rate']:.2f}%",
-                    f"${vendor['total_refunds_issued']:.2f}"
-                ]
-            }
-            pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
+        # Vendor summary
+        summary_data = {
+            'Metric': [
+                'Vendor Name',
+                'Status',
+                'Total Batches',
+                'Total Leads',
+                'Fraudulent Leads',
+                'Average Fraud Rate',
+                'Total Refunds'
+            ],
+            'Value': [
+                vendor['vendor_name'],
+                vendor['vendor_status'],
+                vendor['total_batches'],
+                vendor['total_leads_received'],
+                vendor['total_fraudulent_leads'],
+                f"{vendor['average_fraud_rate']:.2f}%",
+                f"${vendor['total_refunds_issued']:.2f}"
+            ]
+        }
+
+        if xlsxwriter is not None:
+            # Stream batch rows straight from the records, no DataFrame copy
+            columns = list(batches[0])
+            write_excel_rows(output_file, {
+                'Batch History': (columns, ([batch.get(col) for col in columns] for batch in batches)),
+                'Summary': (list(summary_data), zip(*summary_data.values()))
+            })
+        else:
+            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                # Batch history
+                pd.DataFrame(batches).to_excel(writer, sheet_name='Batch History', index=False)
+                pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
 
         print(f"✓ Report exported successfully!")
 
@@ -361,20 +443,23 @@ def main():
     # Initialize analyzer
     analyzer = VendorHistoryAnalyzer()
 
-    # Execute requested analysis
-    if args.list_vendors:
-        analyzer.list_vendors()
+    # Execute requested analysis (all on the analyzer's one connection pool)
+    try:
+        if args.list_vendors:
+            analyzer.list_vendors()
 
-    if args.vendor:
-        analyzer.analyze_vendor(args.vendor)
-        if args.export:
-            analyzer.export_vendor_report(args.vendor)
+        if args.vendor:
+            analyzer.analyze_vendor(args.vendor)
+            if args.export:
+                analyzer.export_vendor_report(args.vendor)
 
-    if args.high_fraud:
-        analyzer.high_fraud_report(threshold=args.threshold)
+        if args.high_fraud:
+            analyzer.high_fraud_report(threshold=args.threshold)
 
-    if args.summary:
-        analyzer.overall_summary()
+        if args.summary:
+            analyzer.overall_summary()
+    finally:
+        analyzer.close()
 
     print("\n" + "=" * 80)
     print("ANALYSIS COMPLETE")